@@ -0,0 +1,169 @@
+"""
+Small in-process metrics registry with Prometheus text exposition.
+
+Every process keeps its counters and histograms in memory. With
+METRICS_DIR set (e.g. under gunicorn), each process also dumps its
+state to METRICS_DIR/<pid>.json at most once per FLUSH_INTERVAL, and
+/metrics sums the files of all processes. Clear the directory when the
+server (re)starts.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 1.0
+
+HELP = {
+    "http_request_duration_seconds": "Request latency per resolved view/action.",
+    "booking_transitions_total": "Booking status transitions.",
+    "cache_requests_total": "Cache lookups by cache and result.",
+}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # held from the "is a flush due?" check to the file replace
+        self._flush_lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._flushed_at = 0.0
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name, labels=None, value=1):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._maybe_flush()
+
+    def observe(self, name, value, labels=None):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+            # buckets are stored non-cumulative, the last one is +Inf
+            histogram[0][bisect_left(BUCKETS, value)] += 1
+            histogram[1] += value
+        self._maybe_flush()
+
+    def _directory(self):
+        return getattr(settings, "METRICS_DIR", "")
+
+    def _is_flush_due(self):
+        return time.monotonic() - self._flushed_at >= FLUSH_INTERVAL
+
+    def _maybe_flush(self):
+        # a thread finding another one flushing skips instead of waiting
+        if self._directory() and self._is_flush_due() and self._flush_lock.acquire(blocking=False):
+            try:
+                if self._is_flush_due():
+                    self._write()
+            finally:
+                self._flush_lock.release()
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, labels, value] for (name, labels), value in self._counters.items()],
+                "histograms": [
+                    [name, labels, list(buckets), total]
+                    for (name, labels), (buckets, total) in self._histograms.items()
+                ],
+            }
+
+    def flush(self):
+        if self._directory():
+            with self._flush_lock:
+                self._write()
+
+    def _write(self):
+        directory = self._directory()
+        self._flushed_at = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.getpid()}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._snapshot(), f)
+        os.replace(tmp_path, os.path.join(directory, f"{os.getpid()}.json"))
+
+    def collect(self):
+        """
+        Returns (counters, histograms) summed over all processes.
+        """
+        directory = self._directory()
+        if directory:
+            self.flush()
+            snapshots = []
+            for filename in os.listdir(directory):
+                if filename.endswith(".json"):
+                    try:
+                        with open(os.path.join(directory, filename)) as f:
+                            snapshots.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue
+        else:
+            snapshots = [self._snapshot()]
+
+        counters = {}
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, total in snapshot["histograms"]:
+                key = (name, tuple(tuple(label) for label in labels))
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+        return counters, histograms
+
+    def render(self):
+        counters, histograms = self.collect()
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for (name, labels), (buckets, total) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), buckets):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+metrics = MetricsRegistry()
+atexit.register(metrics.flush)
@@ -0,0 +1,189 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from Finale_Project.metrics import metrics
+
+logger = logging.getLogger("Finale_Project.queries")
+
+_NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST_RE = re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)")
+
+
+def get_view_name(request):
+    """
+    "RentViewSet.list", "BookingViewSet.confirm_booking", "LoginView.post", ...
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+
+    func = match.func
+    view_class = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if view_class is None:
+        return match.view_name
+
+    method = request.method.lower()
+    actions = getattr(func, "actions", None)
+    if actions:
+        method = actions.get(method, method)
+    return f"{view_class.__name__}.{method}"
+
+
+def fingerprint(sql):
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _IN_LIST_RE.sub("(...)", sql)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+
+class ServerTiming:
+    """
+    Durations of the serialize and encode phases of a request, each without
+    the db time the recorder counted within it.
+    """
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.durations = Counter()
+        self.active = None
+        self._started = None
+
+    def start(self, phase):
+        self.active = phase
+        self._started = (time.perf_counter(), self.recorder.duration)
+
+    def stop(self):
+        started, db_started = self._started
+        elapsed = time.perf_counter() - started - (self.recorder.duration - db_started)
+        self.durations[self.active] += max(elapsed, 0.0)
+        self.active = None
+
+
+class ServerTimingMixin:
+    """
+    Serializer mixin counting to_representation in the serialize phase of
+    Server-Timing. Nested serializers count within their parent.
+    """
+
+    def to_representation(self, instance):
+        request = getattr(self.context.get("request"), "_request", None)
+        timing = getattr(request, "_server_timing", None)
+        if timing is None or timing.active:
+            return super().to_representation(instance)
+
+        timing.start("serialize")
+        try:
+            return super().to_representation(instance)
+        finally:
+            timing.stop()
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts SQL queries and DB time per request, logs requests that exceed
+    the query budget of their view (QUERY_BUDGETS, falling back to
+    QUERY_BUDGET) and, if SERVER_TIMING is on, adds a Server-Timing header
+    with db, view (the view without db and serializing), serialize
+    (ServerTimingMixin serializers), encode (response.render()) and total
+    durations.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        timing = request._server_timing = ServerTiming(recorder)
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        total = time.perf_counter() - start
+        self.check_budget(request, recorder)
+
+        if getattr(settings, "SERVER_TIMING", False):
+            serialize, encode = timing.durations["serialize"], timing.durations["encode"]
+            view = max(total - recorder.duration - serialize - encode, 0.0)
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+                f"view;dur={view * 1000:.1f}",
+                f"serialize;dur={serialize * 1000:.1f}",
+                f"encode;dur={encode * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ])
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook, the inner
+        # middleware (audit log writes) only runs after rendering
+        request._server_timing.start("encode")
+        response.add_post_render_callback(lambda response: request._server_timing.stop())
+        return response
+
+    def check_budget(self, request, recorder):
+        view_name = get_view_name(request)
+        budgets = getattr(settings, "QUERY_BUDGETS", {})
+        budget = budgets.get(view_name, getattr(settings, "QUERY_BUDGET", None))
+        if budget is None or recorder.count <= budget:
+            return
+
+        repeated = [(sql, n) for sql, n in recorder.fingerprints.most_common(3) if n > 1]
+        logger.warning(
+            "%s %s (%s): %d queries, budget %d, db %.1f ms; repeated: %s",
+            request.method,
+            request.path,
+            view_name,
+            recorder.count,
+            budget,
+            recorder.duration * 1000,
+            "; ".join(f"{n}x {sql}" for sql, n in repeated) or "none",
+        )
+
+
+class MetricsMiddleware:
+    """
+    Observes request latency per resolved view/action.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        metrics.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - start,
+            {
+                # unresolved paths share one label to keep cardinality bounded
+                "view": get_view_name(request) or "unresolved",
+                "method": request.method,
+                "status": f"{response.status_code // 100}xx",
+            },
+        )
+        return response
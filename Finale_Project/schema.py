@@ -0,0 +1,105 @@
+"""
+OpenAPI schema served from a pre-generated artifact.
+
+`python manage.py generate_openapi_schema` writes the schema to
+OPENAPI_SCHEMA_FILE at build time. The schema view serves that file
+(reloaded when it changes) or, if there is none, a copy generated once
+per process, with an ETag so unchanged schemas cost a 304.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, yaml_sane_dump
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import OpenAPIRenderer, SwaggerJSONRenderer, SwaggerYAMLRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+API_INFO = openapi.Info(
+    title="Finale Project API",
+    default_version="v1",
+    description="Документация к API проекта аренды жилья",
+)
+
+# the renderers of the schema itself, the others are UI pages
+SPEC_RENDERERS = (OpenAPIRenderer, SwaggerJSONRenderer, SwaggerYAMLRenderer)
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def generate_schema():
+    """
+    Full introspection of all endpoints, returns the schema as JSON bytes.
+    """
+    schema = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def get_schema_content(yaml=False):
+    """
+    Returns (content, etag) of the schema in JSON or YAML.
+    """
+    path = getattr(settings, "OPENAPI_SCHEMA_FILE", None)
+    try:
+        version = os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        version = None
+
+    key = (version, yaml)
+    cached = _cache.get(key)
+    if cached:
+        return cached
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached:
+            return cached
+
+        if version is None:
+            content = _cache.get("generated")
+            if content is None:
+                content = _cache["generated"] = generate_schema()
+        else:
+            with open(path, "rb") as f:
+                content = f.read()
+
+        if yaml:
+            content = yaml_sane_dump(json.loads(content), binary=True)
+
+        cached = _cache[key] = (content, '"{}"'.format(hashlib.md5(content).hexdigest()))
+        return cached
+
+
+_SchemaView = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+
+class SchemaView(_SchemaView):
+    def get(self, request, version="", format=None):
+        renderer = request.accepted_renderer
+        # the UI pages don't introspect the endpoints, only spec requests do
+        if not isinstance(renderer, SPEC_RENDERERS):
+            return super().get(request, version, format)
+
+        content, etag = get_schema_content(yaml=isinstance(renderer, SwaggerYAMLRenderer))
+        # weak comparison (RFC 9110, 13.1.2): W/"x" matches "x", nothing else does
+        tags = {tag.removeprefix("W/") for tag in parse_etags(request.headers.get("If-None-Match", ""))}
+        if etag in tags or "*" in tags:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=renderer.media_type)
+        response["ETag"] = etag
+        return response
+
+
+schema_view = SchemaView
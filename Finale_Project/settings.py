@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     # 3-rd party
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'django_filters',
     'drf_yasg',
 
@@ -58,7 +59,7 @@ INSTALLED_APPS = [
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-    'ROTATE_REFRESH_TOKENS': False,
+    'ROTATE_REFRESH_TOKENS': env.bool('ROTATE_REFRESH_TOKENS', default=False),
     'BLACKLIST_AFTER_ROTATION': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -78,6 +79,9 @@ SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
 }
 
+# generated at build time by `python manage.py generate_openapi_schema`
+OPENAPI_SCHEMA_FILE = env.str('OPENAPI_SCHEMA_FILE', default=str(BASE_DIR / 'openapi.json'))
+
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -88,6 +92,18 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.BasicAuthentication',
         'applications.user.auth.CookieJWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'Finale_Project.renderers.FastJSONRenderer',
+        'Finale_Project.renderers.MessagePackRenderer',
+        'Finale_Project.renderers.NDJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'Finale_Project.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -97,15 +113,56 @@ REST_FRAMEWORK = {
 
 
 MIDDLEWARE = [
+    'Finale_Project.middleware.MetricsMiddleware',
+    'Finale_Project.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'applications.rent.audit.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Server-Timing header with db/view/serialize/encode durations per request
+SERVER_TIMING = env.bool('SERVER_TIMING', default=DEBUG)
+
+# requests with more SQL queries than their view's budget are logged
+# with the most repeated query fingerprints (N+1 candidates)
+QUERY_BUDGET = env.int('QUERY_BUDGET', default=20)
+QUERY_BUDGETS = {
+    # 'RentViewSet.list': 5,
+}
+
+# /metrics: with several worker processes (gunicorn) set METRICS_DIR to an
+# empty directory shared by the workers, they aggregate through it. The
+# endpoint answers 404 until METRICS_TOKEN is set.
+METRICS_DIR = env.str('METRICS_DIR', default='')
+METRICS_TOKEN = env.str('METRICS_TOKEN', default='')
+
+# how long responses to requests with an Idempotency-Key header are replayed, seconds
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 3600)
+# how long a key stays "in progress" before a retry may take it over,
+# seconds; longer than the slowest idempotent request
+IDEMPOTENCY_KEY_LEASE = env.int('IDEMPOTENCY_KEY_LEASE', default=5 * 60)
+
+# booking status events for the SSE stream (/api/rent/bookings/events/);
+# with several ASGI workers use applications.rent.events.CacheBackend
+# together with a shared cache (Redis, Memcached)
+BOOKING_EVENTS_BACKEND = env.str('BOOKING_EVENTS_BACKEND', default='applications.rent.events.InProcessBackend')
+
+# the default cache holds the version stamps worker processes compare (rent
+# autocomplete, cached rent responses); with several workers point CACHE_URL
+# at a shared one (redis://..., pymemcache://...), manage.py check --deploy warns
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+
+# fills Rent.latitude / longitude (manage.py geocode_rents); for tests and
+# offline imports applications.rent.geocoding.FileProvider reads GEOCODING_FILE
+GEOCODING_PROVIDER = env.str('GEOCODING_PROVIDER', default='applications.rent.geocoding.NominatimProvider')
+GEOCODING_FILE = env.str('GEOCODING_FILE', default='')
+GEOCODING_USER_AGENT = env.str('GEOCODING_USER_AGENT', default='rental-platform')
+
 ROOT_URLCONF = 'Finale_Project.urls'
 
 TEMPLATES = [
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from applications.rent.models import Rent
+from applications.user.models import User
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user("landlord@example.com", "pw12345!", role="LANDLORD")
+        for _ in range(3):
+            Rent.objects.create(
+                owner=cls.landlord, title="Flat", description="Nice flat", city="Berlin",
+                address="Main st 1", price="100.00", rooms_count=2, room_type="STUDIO",
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_phases(self):
+        response = self.client.get("/api/rent/rents/")
+        durations = {}
+        for entry in response["Server-Timing"].split(", "):
+            name, duration = entry.split(";")[:2]
+            durations[name] = float(duration.removeprefix("dur="))
+        self.assertEqual(list(durations), ["db", "view", "serialize", "encode", "total"])
+        # the phases don't overlap, so they add up to the total
+        total = durations.pop("total")
+        self.assertAlmostEqual(sum(durations.values()), total, delta=0.5)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/rent/rents/"))
+
+    @override_settings(QUERY_BUDGET=1)
+    def test_over_budget_is_logged(self):
+        with self.assertLogs("Finale_Project.queries", "WARNING") as logs:
+            self.client.get("/api/rent/rents/")
+        self.assertIn("(RentViewSet.list)", logs.output[0])
+
+
+class MetricsViewTests(TestCase):
+    @override_settings(METRICS_TOKEN="")
+    def test_without_configured_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_wrong_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret", METRICS_DIR="")
+    def test_exposition(self):
+        self.client.get("/api/rent/rents/")
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",status="4xx",view="RentViewSet.list"}',
+            response.content.decode(),
+        )
+
+
+class SchemaViewTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "openapi.json")
+        with open(path, "w") as f:
+            json.dump({"swagger": "2.0", "info": {"title": "Test", "version": "v1"}, "paths": {}}, f)
+        settings_override = override_settings(OPENAPI_SCHEMA_FILE=path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_serves_the_generated_file(self):
+        response = self.client.get("/swagger/?format=openapi")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["info"]["title"], "Test")
+        self.assertTrue(response["ETag"])
+
+    def test_not_modified(self):
+        etag = self.client.get("/swagger/?format=openapi")["ETag"]
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = self.client.get("/swagger/?format=openapi", headers={"If-None-Match": header})
+            self.assertEqual(response.status_code, 304, header)
+        response = self.client.get("/swagger/?format=openapi", headers={"If-None-Match": '"other"'})
+        self.assertEqual(response.status_code, 200)
@@ -16,25 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from Finale_Project.schema import schema_view
+from Finale_Project.views import metrics_view
 
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Finale Project API",
-        default_version="v1",
-        description="Документация к API проекта аренды жилья",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/rent/', include('applications.rent.urls')),
     path('api/user/', include('applications.user.urls')),
+    path('metrics', metrics_view, name='metrics'),
 
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from Finale_Project.metrics import metrics
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition for scrapers sending METRICS_TOKEN (Bearer).
+    Without a configured token the endpoint doesn't exist.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        raise Http404
+    if not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
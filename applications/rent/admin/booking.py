@@ -1,9 +1,6 @@
 from django.contrib import admin, messages
-from django.contrib.admin.models import LogEntry, CHANGE
 from django.urls import reverse
 from django.utils.html import format_html
-from django.utils.encoding import force_str
-from django.contrib.contenttypes.models import ContentType
 from applications.rent.models import Booking
 from applications.user.choices.roles import UserRole
 
@@ -29,7 +26,7 @@ class BookingAdmin(admin.ModelAdmin):
             return qs.filter(tenant=user)
 
         if getattr(user, "role", None) == UserRole.LANDLORD.name:
-            return qs.filter(rent__owner=user)
+            return qs.filter(rent_owner=user)
 
         return qs.none()
 
@@ -70,16 +67,6 @@ class BookingAdmin(admin.ModelAdmin):
 
     colored_status.short_description = "Статус"
 
-    def log_change(self, request, obj, message):
-        LogEntry.objects.log_action(
-            user_id=request.user.pk,
-            content_type_id=ContentType.objects.get_for_model(obj).pk,
-            object_id=obj.pk,
-            object_repr=force_str(obj),
-            action_flag=CHANGE,
-            change_message=message,
-        )
-
     def confirm_booking(self, request, queryset):
         if getattr(request.user, "role", None) != UserRole.LANDLORD.name:
             self.message_user(
@@ -93,11 +80,10 @@ class BookingAdmin(admin.ModelAdmin):
         for booking in queryset:
             if booking.status != Booking.Status.PENDING:
                 continue
-            if booking.rent.owner != request.user:
+            if booking.rent_owner_id != request.user.pk:
                 continue
             booking.status = Booking.Status.CONFIRMED
             booking.save()
-            self.log_change(request, booking, "✅ Бронирование подтверждено через admin-действие")
             count += 1
 
         self.message_user(request, f"✅ confirm {count} booking.", messages.SUCCESS)
@@ -113,11 +99,10 @@ class BookingAdmin(admin.ModelAdmin):
         for booking in queryset:
             if booking.status != Booking.Status.PENDING:
                 continue
-            if booking.rent.owner != request.user:
+            if booking.rent_owner_id != request.user.pk:
                 continue
             booking.status = Booking.Status.DECLINED
             booking.save()
-            self.log_change(request, booking, "❌ Бронирование отклонено через admin-действие")
             count += 1
 
         self.message_user(request, f"❌ Отклонено {count} бронирований.", messages.WARNING)
@@ -133,7 +118,6 @@ class BookingAdmin(admin.ModelAdmin):
                 continue
             booking.status = Booking.Status.CANCELLED
             booking.save()
-            self.log_change(request, booking, "🔁 Бронирование отменено через admin-действие")
             count += 1
         self.message_user(request, f"🔁 Отменено {count} бронирований.", messages.INFO)
 
@@ -7,6 +7,7 @@ from applications.rent.filters import (
     RoomTypeFilter,
     RoomsCountFilter,
     PriceRangeDropdownFilter,
+    SuspectedDuplicateFilter,
 )
 
 
@@ -14,15 +15,17 @@ from applications.rent.filters import (
 @admin.register(Rent)
 class RentAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "owner", "city", "price_display",
-        "rooms_count", "room_type", "is_active", "created_date", "average_rating",
+        "rooms_count", "room_type", "is_active", "created_date", "average_rating", "duplicate_of",
         #"price", "latitude", "longitude", "address",
     )
     list_filter = (
         "is_active",
+        "needs_geocoding",
         CityListFilter,
         RoomTypeFilter,
         RoomsCountFilter,
         PriceRangeDropdownFilter,
+        SuspectedDuplicateFilter,
     )
     search_fields = ("title", "address", "city", "owner__email")
     inlines = [ReviewInline]
@@ -30,7 +33,7 @@ class RentAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        qs = qs.annotate(avg_rating=Avg("reviews__rating"))
+        qs = qs.annotate(avg_rating=Avg("reviews__rating")).select_related("signature")
         user = request.user
 
         if user.is_superuser:
@@ -81,6 +84,14 @@ class RentAdmin(admin.ModelAdmin):
     average_rating.short_description = "⭐ Average score"
     average_rating.admin_order_field = "reviews__rating"
 
+    def duplicate_of(self, obj):
+        signature = getattr(obj, "signature", None)
+        if signature is None or signature.duplicate_of_id is None:
+            return "—"
+        return f"#{signature.duplicate_of_id} ({signature.similarity:.0%})"
+
+    duplicate_of.short_description = "Duplicate of"
+
     def price_display(self, obj):
         return f"{obj.price} € / month"
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from applications.rent.models import Review, Booking
+from applications.rent.models import Review
 
 
 
@@ -55,17 +55,11 @@ class ReviewInline(admin.TabularInline):
         if not obj or not request.user.is_authenticated:
             return False
 
-        is_tenant = request.user.role == "TENANT"
-        has_booking = obj.bookings.filter(
-            tenant=request.user,
-            status=Booking.Status.CONFIRMED
-        ).exists()
-        already_reviewed = Review.objects.filter(
-            rent=obj,
-            author=request.user
-        ).exists()
-
-        return is_tenant and has_booking and not already_reviewed
+        if request.user.role != "TENANT":
+            return False
+
+        eligibility = Review.get_eligibility(request.user, obj)
+        return eligibility["has_confirmed_stay"] and not eligibility["already_reviewed"]
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'applications.rent'
+
+    def ready(self):
+        from applications.rent import checks, signals  # noqa: F401
@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.db import transaction
+from django.urls import reverse
+
+from applications.rent.models import AuditEntry
+
+# a field deferred when the object was loaded
+MISSING = object()
+
+_collector = ContextVar("audit_collector", default=None)
+
+
+class AuditCollector:
+    def __init__(self, source, request=None):
+        self.source = source
+        self.request = request
+        self.entries = []
+
+    def get_actor_id(self):
+        # DRF puts the user it authenticated on the Django request too
+        user = getattr(self.request, "user", None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+
+@contextmanager
+def collect_audit(source, request=None):
+    """
+    Buffers the entries of the changes committed inside the block and
+    writes them with one bulk_create when it ends. Entries of rolled
+    back transactions are dropped.
+    """
+    collector = AuditCollector(source, request)
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+        if collector.entries:
+            AuditEntry.objects.bulk_create(collector.entries)
+
+
+class AuditMiddleware:
+    """
+    Collects the audit entries of each request, written in one query at
+    its end. Changes under the admin site have the admin source, the
+    others the API one.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.admin_prefix = None
+
+    def __call__(self, request):
+        if self.admin_prefix is None:
+            self.admin_prefix = reverse("admin:index")
+        source = AuditEntry.Source.ADMIN if request.path.startswith(self.admin_prefix) else AuditEntry.Source.API
+        with collect_audit(source, request):
+            return self.get_response(request)
+
+
+@lru_cache(maxsize=None)
+def get_audited_fields(model):
+    """
+    (name, attname) of the fields users edit; computed ones such as
+    rank_score or the denormalized rent_owner aren't audited.
+    """
+    return tuple(
+        (field.name, field.attname)
+        for field in model._meta.concrete_fields
+        if field.editable and not field.primary_key
+    )
+
+
+def load_snapshot(instance, update_fields=None):
+    """
+    Reads the stored values of the audited fields (only update_fields if
+    given) before an update, so objects that are only read cost nothing.
+    """
+    fields = [
+        (name, attname)
+        for name, attname in get_audited_fields(type(instance))
+        if update_fields is None or name in update_fields
+    ]
+    row = type(instance)._base_manager.filter(pk=instance.pk).values(*(attname for _, attname in fields)).first()
+    instance._audit_snapshot = tuple(
+        (row or {}).get(attname, MISSING) for _, attname in get_audited_fields(type(instance))
+    )
+
+
+def record(instance, action, changes):
+    collector = _collector.get()
+    entry = AuditEntry(
+        object_type=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+        changes=changes,
+        actor_id=collector.get_actor_id() if collector else None,
+        source=collector.source if collector else AuditEntry.Source.COMMAND,
+    )
+    if collector is not None:
+        transaction.on_commit(lambda: collector.entries.append(entry))
+    else:
+        # outside requests and collect_audit blocks (shell, scripts)
+        transaction.on_commit(lambda: AuditEntry.objects.bulk_create([entry]))
+
+
+def record_saved(instance, created, update_fields=None):
+    """
+    Records a create with the initial values or an update with the
+    fields that changed from the stored ones (see load_snapshot).
+    """
+    fields = get_audited_fields(type(instance))
+    if created:
+        changes = {
+            name: [None, instance.__dict__[attname]]
+            for name, attname in fields
+            if instance.__dict__.get(attname) not in (None, "")
+        }
+        action = AuditEntry.Action.CREATE
+    else:
+        loaded = getattr(instance, "_audit_snapshot", None) or (MISSING,) * len(fields)
+        changes = {
+            name: [before, instance.__dict__[attname]]
+            for (name, attname), before in zip(fields, loaded)
+            if before is not MISSING
+            and attname in instance.__dict__
+            and (update_fields is None or name in update_fields)
+            and before != instance.__dict__[attname]
+        }
+        action = AuditEntry.Action.UPDATE
+
+    if changes:
+        record(instance, action, changes)
+    instance._audit_snapshot = None
+
+
+def record_deleted(instance):
+    changes = {
+        name: [instance.__dict__[attname], None]
+        for name, attname in get_audited_fields(type(instance))
+        if attname in instance.__dict__
+    }
+    record(instance, AuditEntry.Action.DELETE, changes)
+
+
+def record_created(instances):
+    # bulk_create doesn't send post_save; the caller sets the pks the backend didn't return
+    for instance in instances:
+        if instance.pk is None:
+            raise ValueError(f"Can't audit a {instance._meta.model_name} without a primary key.")
+        record_saved(instance, created=True)
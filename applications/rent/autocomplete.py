@@ -0,0 +1,170 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from django.core.cache import cache
+
+from Finale_Project.metrics import metrics
+
+from applications.rent.models import Rent
+
+VERSION_KEY = "rent_autocomplete_version"
+# how often a process checks the shared version stamp for changes made by other processes
+VERSION_CHECK_INTERVAL = 5
+DEFAULT_LIMIT = 10
+# shorter prefixes match most of the index and aren't worth answering
+MIN_PREFIX_LENGTH = 2
+MAX_LIMIT = 50
+
+
+def normalize(value):
+    return " ".join((value or "").split()).casefold()
+
+
+class PrefixIndex:
+    """
+    Sorted list of normalized values with listing counts.
+    A prefix search is a bisect over the sorted keys.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+
+    def add(self, value):
+        key = normalize(value)
+        if not key:
+            return
+        entry = self._entries.get(key)
+        if entry:
+            entry[1] += 1
+        else:
+            self._entries[key] = [" ".join(value.split()), 1]
+            insort(self._keys, key)
+
+    def remove(self, value):
+        key = normalize(value)
+        entry = self._entries.get(key)
+        if not entry:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._entries[key]
+            del self._keys[bisect_left(self._keys, key)]
+
+    def search(self, prefix, limit):
+        key = normalize(prefix)
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key + "\U0010ffff", lo=start)
+        top = heapq.nlargest(limit, self._keys[start:end], key=lambda k: self._entries[k][1])
+        return [{"value": self._entries[k][0], "count": self._entries[k][1]} for k in top]
+
+
+class RentAutocomplete:
+    """
+    Per-process index of cities and addresses of active rents.
+
+    Loaded lazily on first search, updated in place by Rent signals in the
+    process that made the change, and rebuilt when the version stamp in the
+    shared cache shows that another process changed rents. With a process-local
+    default cache other processes never see the stamp move, so deployments
+    with several workers need a shared one (CACHE_URL, see rent.checks).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version = None
+        self._checked_at = 0
+        self._rents = {}
+        self.cities = PrefixIndex()
+        self.addresses = PrefixIndex()
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        if len(normalize(prefix)) < MIN_PREFIX_LENGTH:
+            return {"cities": [], "addresses": []}
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "cities": self.cities.search(prefix, limit),
+                "addresses": self.addresses.search(prefix, limit),
+            }
+
+    def rent_saved(self, rent):
+        with self._lock:
+            if self._loaded:
+                self._remove(rent.pk)
+                if rent.is_active:
+                    self._add(rent.pk, rent.city, rent.address)
+        self._bump_version()
+
+    def rent_deleted(self, rent):
+        with self._lock:
+            if self._loaded:
+                self._remove(rent.pk)
+        self._bump_version()
+
+    def rents_updated(self):
+        """
+        For bulk updates that don't touch city or address but skip the
+        signals: moves the version on for the caches keyed on it.
+        """
+        self._bump_version()
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return
+
+        version = cache.get(VERSION_KEY)
+        with self._lock:
+            self._checked_at = now
+            if self._loaded and version == self._version:
+                return
+            metrics.inc("cache_requests_total", {"cache": "rent_autocomplete", "result": "rebuild"})
+            self._load(version)
+
+    def _load(self, version):
+        if version is None:
+            cache.add(VERSION_KEY, 0, timeout=None)
+            version = cache.get(VERSION_KEY, 0)
+
+        self._rents = {}
+        self.cities = PrefixIndex()
+        self.addresses = PrefixIndex()
+        rows = Rent.objects.filter(is_active=True).order_by().values_list("id", "city", "address")
+        for rent_id, city, address in rows.iterator():
+            self._add(rent_id, city, address)
+
+        self._version = version
+        self._loaded = True
+
+    def _add(self, rent_id, city, address):
+        self._rents[rent_id] = (city, address)
+        self.cities.add(city)
+        self.addresses.add(address)
+
+    def _remove(self, rent_id):
+        values = self._rents.pop(rent_id, None)
+        if values:
+            self.cities.remove(values[0])
+            self.addresses.remove(values[1])
+
+    def _bump_version(self):
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 1, timeout=None)
+            version = cache.get(VERSION_KEY)
+
+        with self._lock:
+            # the change is already applied here, unless another process
+            # changed rents in between, then rebuild on the next search
+            if self._loaded and self._version is not None and version == self._version + 1:
+                self._version = version
+            else:
+                self._checked_at = 0
+
+
+rent_autocomplete = RentAutocomplete()
@@ -0,0 +1,80 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from applications.rent.models import Rent, Booking, CalendarHold
+
+ACTIVE_STATUSES = [Booking.Status.PENDING, Booking.Status.CONFIRMED]
+BATCH_SIZE = 500
+
+
+def compute_availability(bookings, today):
+    """
+    First free date from today and the length of that free window in days
+    (None if open-ended), for a rent's active (check_in, check_out) pairs
+    sorted by check_in. The check_out day is free for the next guest.
+    """
+    free_from = today
+    for check_in, check_out in bookings:
+        if check_in > free_from:
+            return free_from, (check_in - free_from).days
+        free_from = max(free_from, check_out)
+    return free_from, None
+
+
+def get_busy_dates(rent_ids, today):
+    """
+    Sorted (start, end) pairs of the active bookings and calendar holds
+    not over by today, by rent id.
+    """
+    busy = {rent_id: [] for rent_id in rent_ids}
+    for rent_id, check_in, check_out in Booking.objects.filter(
+        rent_id__in=busy, status__in=ACTIVE_STATUSES, check_out__gt=today
+    ).values_list("rent_id", "check_in", "check_out"):
+        busy[rent_id].append((check_in, check_out))
+    # external calendar holds block dates like bookings
+    for rent_id, start, end in CalendarHold.objects.filter(
+        rent_id__in=busy, end__gt=today
+    ).values_list("rent_id", "start", "end"):
+        busy[rent_id].append((start, end))
+    for dates in busy.values():
+        dates.sort()
+    return busy
+
+
+def update_availability(rent_ids=None, stale_only=False):
+    """
+    Recomputes next_available_from / free_window_days for the given rents,
+    or for all rents if rent_ids is None. With stale_only, only rents whose
+    next_available_from has passed: for the others the result can't change
+    as days go by. Returns the number of rents whose availability changed.
+    """
+    today = timezone.localdate()
+    queryset = Rent.objects.order_by("id")
+    if rent_ids is not None:
+        queryset = queryset.filter(id__in=rent_ids)
+    if stale_only:
+        queryset = queryset.filter(Q(next_available_from__isnull=True) | Q(next_available_from__lt=today))
+
+    rows = list(queryset.values_list("id", "next_available_from", "free_window_days"))
+    now = timezone.now()
+    updated = 0
+    for start in range(0, len(rows), BATCH_SIZE):
+        chunk = rows[start:start + BATCH_SIZE]
+        busy = get_busy_dates([row[0] for row in chunk], today)
+
+        changed = []
+        for rent_id, current_from, current_days in chunk:
+            available_from, free_days = compute_availability(busy[rent_id], today)
+            if (available_from, free_days) != (current_from, current_days):
+                changed.append(Rent(
+                    id=rent_id,
+                    next_available_from=available_from,
+                    free_window_days=free_days,
+                    availability_updated_at=now,
+                ))
+
+        if changed:
+            updated += Rent.objects.bulk_update(
+                changed, ["next_available_from", "free_window_days", "availability_updated_at"]
+            )
+    return updated
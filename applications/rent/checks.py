@@ -0,0 +1,22 @@
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Rent autocomplete and the cached rent responses compare version stamps
+    across processes through the default cache.
+    """
+    if not isinstance(caches["default"], (LocMemCache, DummyCache)):
+        return []
+    return [
+        checks.Warning(
+            "The default cache is local to each process, so worker processes "
+            "don't see each other's rent changes in autocomplete and cached responses.",
+            hint="Set CACHE_URL to a shared cache (redis://..., pymemcache://...) unless only one process serves requests.",
+            id="rent.W001",
+        )
+    ]
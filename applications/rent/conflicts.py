@@ -0,0 +1,173 @@
+import heapq
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice
+from operator import itemgetter
+
+import django
+from django.db import transaction
+
+from applications.rent.availability import ACTIVE_STATUSES
+from applications.rent.models import Booking
+
+# rents read per query and handed to a worker at a time
+RENT_CHUNK_SIZE = 200
+
+# booking rows are (id, check_in, check_out, status, created_at)
+ID, CHECK_IN, CHECK_OUT, STATUS, CREATED_AT = range(5)
+
+
+def iter_rent_bookings(rent_ids=None, chunk_size=RENT_CHUNK_SIZE):
+    """
+    Yields (rent_id, bookings) with the active bookings of each rent in
+    (rent, check_in) order. Rents are read chunk_size at a time, so memory
+    stays bounded on MySQL as well, whose driver buffers whole results.
+    """
+    queryset = Booking.objects.filter(status__in=ACTIVE_STATUSES)
+    if rent_ids is not None:
+        queryset = queryset.filter(rent_id__in=rent_ids)
+
+    ids = list(queryset.order_by("rent_id").values_list("rent_id", flat=True).distinct())
+    for start in range(0, len(ids), chunk_size):
+        rows = queryset.filter(rent_id__in=ids[start:start + chunk_size]).order_by(
+            "rent_id", "check_in", "id"
+        ).values_list("rent_id", "id", "check_in", "check_out", "status", "created_at")
+        for rent_id, group in groupby(rows, key=itemgetter(0)):
+            yield rent_id, [row[1:] for row in group]
+
+
+def find_overlaps(bookings):
+    """
+    Every overlapping pair among a rent's bookings sorted by check_in.
+    A sweep over the check-in dates keeps a heap of the stays still
+    running by check-out: O(n log n) plus the number of pairs.
+    """
+    running = []
+    pairs = []
+    for booking in bookings:
+        while running and running[0][0] <= booking[CHECK_IN]:
+            heapq.heappop(running)
+        pairs += [(other, booking) for _, _, other in running]
+        heapq.heappush(running, (booking[CHECK_OUT], booking[ID], booking))
+    return pairs
+
+
+def pick_declines(pairs):
+    """
+    Pending bookings to decline so the conflicts go away. Confirmed
+    bookings are kept first, then the others in creation order; a pending
+    booking overlapping a kept one is declined. Conflicts between
+    confirmed bookings remain for a human.
+    """
+    involved = {booking[ID]: booking for pair in pairs for booking in pair}
+    kept = []
+    declined = []
+    for booking in sorted(
+        involved.values(),
+        key=lambda b: (b[STATUS] != Booking.Status.CONFIRMED, b[CREATED_AT], b[ID]),
+    ):
+        overlaps = any(
+            other[CHECK_IN] < booking[CHECK_OUT] and booking[CHECK_IN] < other[CHECK_OUT] for other in kept
+        )
+        if overlaps and booking[STATUS] == Booking.Status.PENDING:
+            declined.append(booking[ID])
+        else:
+            kept.append(booking)
+    return declined
+
+
+def audit_rents(chunk):
+    """
+    (rent_id, pairs, declines) for the rents of a chunk with conflicts.
+    Runs in the worker processes, so it works on plain rows only.
+    """
+    results = []
+    for rent_id, bookings in chunk:
+        pairs = find_overlaps(bookings)
+        if pairs:
+            results.append((rent_id, pairs, pick_declines(pairs)))
+    return results
+
+
+def audit_in_processes(chunks, workers):
+    """
+    Results of audit_rents() for the chunks, computed in spawned worker
+    processes: forked ones would share the database connection the
+    parent opens to read the chunks. A few chunks are in flight per
+    worker, not the whole table.
+    """
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(audit_rents, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def booking_row(booking):
+    return {
+        "id": booking[ID],
+        "status": booking[STATUS],
+        "check_in": booking[CHECK_IN],
+        "check_out": booking[CHECK_OUT],
+        "created_at": booking[CREATED_AT],
+    }
+
+
+def decline_bookings(booking_ids):
+    """
+    Declines the bookings that are still pending, through save() so the
+    status signals (events, availability, calendars) run. Returns their ids.
+    """
+    declined = []
+    with transaction.atomic():
+        for booking in Booking.objects.select_for_update().filter(
+            id__in=booking_ids, status=Booking.Status.PENDING
+        ).order_by("id"):
+            booking.status = Booking.Status.DECLINED
+            booking.save(update_fields=["status"])
+            declined.append(booking.pk)
+    return declined
+
+
+def audit_bookings(rent_ids=None, workers=1, decline=False):
+    """
+    Finds overlapping PENDING/CONFIRMED bookings, which the non-atomic
+    overlap check and bulk paths can let through. Rents are swept in
+    chunks, in worker processes if workers > 1. With decline, the later
+    pending bookings of each conflict are declined (see pick_declines),
+    without it the report only lists them in to_decline.
+    """
+    report = {"rents": 0, "bookings": 0, "conflicts": [], "to_decline": [], "declined": []}
+
+    def chunks():
+        rents = iter_rent_bookings(rent_ids)
+        while chunk := list(islice(rents, RENT_CHUNK_SIZE)):
+            report["rents"] += len(chunk)
+            report["bookings"] += sum(len(bookings) for _, bookings in chunk)
+            yield chunk
+
+    if workers > 1:
+        results = audit_in_processes(chunks(), workers)
+    else:
+        results = (result for chunk in chunks() for result in audit_rents(chunk))
+
+    for rent_id, pairs, declines in results:
+        report["conflicts"] += [
+            {
+                "rent": rent_id,
+                "bookings": [booking_row(first), booking_row(second)],
+                "overlap_nights": (min(first[CHECK_OUT], second[CHECK_OUT]) - second[CHECK_IN]).days,
+            }
+            for first, second in pairs
+        ]
+        report["to_decline"] += declines
+
+    if decline and report["to_decline"]:
+        report["declined"] = decline_bookings(report["to_decline"])
+    return report
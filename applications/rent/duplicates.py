@@ -0,0 +1,245 @@
+import hashlib
+import random
+import re
+import struct
+from collections import defaultdict
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Count
+
+from applications.rent.autocomplete import normalize
+from applications.rent.models import Rent, RentSignature, RentSignatureBand
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 similarity are likely to share a bucket
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# estimated Jaccard similarity from which a rent is flagged
+THRESHOLD = 0.8
+BATCH_SIZE = 500
+
+MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(20250601)
+PERMUTATIONS = [
+    (_random.randrange(1, MERSENNE_PRIME), _random.randrange(MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+SIGNATURE_FORMAT = f"<{NUM_PERM}Q"
+
+
+def get_shingles(title, description, address, city):
+    """
+    Word 3-grams of the normalized title and description, and word
+    pairs of the address with the city, marked so they don't mix
+    with the text.
+    """
+    words = re.findall(r"\w+", normalize(f"{title} {description}"))
+    location = re.findall(r"\w+", normalize(f"{address} {city}"))
+    return {
+        *(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))),
+        *("@" + " ".join(location[i:i + 2]) for i in range(max(1, len(location) - 1))),
+    }
+
+
+def hash64(data, signed=False):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little", signed=signed)
+
+
+def minhash(shingles):
+    hashes = [hash64(shingle.encode()) for shingle in shingles] or [0]
+    return [min((a * x + b) % MERSENNE_PRIME for x in hashes) for a, b in PERMUTATIONS]
+
+
+def band_keys(signature):
+    return [
+        (band, hash64(struct.pack(f"<{ROWS}Q", *signature[band * ROWS:(band + 1) * ROWS]), signed=True))
+        for band in range(BANDS)
+    ]
+
+
+def similarity(signature, other):
+    return sum(a == b for a, b in zip(signature, other)) / NUM_PERM
+
+
+def pack(signature):
+    return struct.pack(SIGNATURE_FORMAT, *signature)
+
+
+def unpack(data):
+    return struct.unpack(SIGNATURE_FORMAT, bytes(data))
+
+
+def get_text_hash(title, description, address, city):
+    return hashlib.md5(repr((title, description, address, city)).encode()).hexdigest()
+
+
+def sign(title, description, address, city):
+    return minhash(get_shingles(title, description, address, city))
+
+
+def find_matches(rent_id, signature):
+    """
+    Rents sharing an LSH bucket with the signature whose estimated
+    similarity reaches THRESHOLD, as {rent_id: similarity}.
+    """
+    keys = set(band_keys(signature))
+    candidates = {
+        other_id
+        for other_id, band, bucket in RentSignatureBand.objects.filter(
+            bucket__in=[bucket for _, bucket in keys]
+        ).exclude(rent_id=rent_id).values_list("rent_id", "band", "bucket")
+        if (band, bucket) in keys
+    }
+    matches = {}
+    for other_id, data in RentSignature.objects.filter(rent_id__in=candidates).values_list("rent_id", "minhash"):
+        score = similarity(signature, unpack(data))
+        if score >= THRESHOLD:
+            matches[other_id] = score
+    return matches
+
+
+def pick_original(rent_id, matches):
+    """
+    The earliest matching rent before rent_id and its similarity: the
+    first posting isn't the duplicate.
+    """
+    earlier = [other_id for other_id in matches if other_id < rent_id]
+    if not earlier:
+        return None, None
+    return min(earlier), matches[min(earlier)]
+
+
+def recheck(signature_row):
+    signature = unpack(signature_row.minhash)
+    signature_row.duplicate_of_id, signature_row.similarity = pick_original(
+        signature_row.rent_id, find_matches(signature_row.rent_id, signature)
+    )
+    signature_row.save(update_fields=["duplicate_of", "similarity", "updated_at"])
+
+
+def update_signature(rent):
+    """
+    Signs a created or edited rent and flags it, or the later rents that
+    now look like copies of it. Rents flagged as copies of it that no
+    longer match are checked again. The cost follows the bucket
+    neighbours, not the number of rents. Returns the rent's duplicate_of id.
+    """
+    values = (rent.title, rent.description, rent.address, rent.city)
+    text_hash = get_text_hash(*values)
+    stored = RentSignature.objects.filter(rent_id=rent.pk).only("text_hash", "duplicate_of").first()
+    if stored is not None and stored.text_hash == text_hash:
+        return stored.duplicate_of_id
+
+    signature = sign(*values)
+    matches = find_matches(rent.pk, signature)
+    duplicate_of, score = pick_original(rent.pk, matches)
+
+    with transaction.atomic():
+        RentSignature.objects.update_or_create(rent_id=rent.pk, defaults={
+            "minhash": pack(signature),
+            "text_hash": text_hash,
+            "duplicate_of_id": duplicate_of,
+            "similarity": score,
+        })
+        RentSignatureBand.objects.filter(rent_id=rent.pk).delete()
+        RentSignatureBand.objects.bulk_create(
+            RentSignatureBand(rent_id=rent.pk, band=band, bucket=bucket) for band, bucket in band_keys(signature)
+        )
+
+        for other_id, other_score in matches.items():
+            if other_id > rent.pk:
+                RentSignature.objects.filter(rent_id=other_id, duplicate_of__isnull=True).update(
+                    duplicate_of_id=rent.pk, similarity=other_score
+                )
+        for stale in RentSignature.objects.filter(duplicate_of_id=rent.pk).exclude(rent_id__in=matches):
+            recheck(stale)
+
+    return duplicate_of
+
+
+def sign_queued_rents():
+    """
+    Signs the rents queued with needs_signature, see update_signature().
+    A rent edited meanwhile stays queued. Returns the number of signed
+    and of flagged rents.
+    """
+    rent_ids = list(Rent.objects.filter(needs_signature=True).order_by("id").values_list("id", flat=True))
+    flagged = 0
+    for start in range(0, len(rent_ids), BATCH_SIZE):
+        for rent in Rent.objects.filter(id__in=rent_ids[start:start + BATCH_SIZE]).order_by("id").only(
+            "title", "description", "address", "city", "updated_at"
+        ):
+            if update_signature(rent) is not None:
+                flagged += 1
+            Rent.objects.filter(id=rent.pk, updated_at=rent.updated_at).update(needs_signature=False)
+    return len(rent_ids), flagged
+
+
+def rebuild_signatures():
+    """
+    Signs every rent and flags duplicates from scratch. Signatures are
+    written in batches, candidate pairs come from the buckets shared by
+    several rents, and only the signatures of those rents are loaded
+    again. Returns the number of signed and of flagged rents.
+    """
+    # rents edited from here on are queued again
+    Rent.objects.filter(needs_signature=True).update(needs_signature=False)
+    rent_ids = list(Rent.objects.order_by("id").values_list("id", flat=True))
+    RentSignature.objects.all().delete()
+    RentSignatureBand.objects.all().delete()
+
+    for start in range(0, len(rent_ids), BATCH_SIZE):
+        rows = Rent.objects.filter(id__in=rent_ids[start:start + BATCH_SIZE]).values_list(
+            "id", "title", "description", "address", "city"
+        )
+        signatures = []
+        bands = []
+        for rent_id, *values in rows:
+            signature = sign(*values)
+            signatures.append(RentSignature(rent_id=rent_id, minhash=pack(signature), text_hash=get_text_hash(*values)))
+            bands += [RentSignatureBand(rent_id=rent_id, band=band, bucket=bucket) for band, bucket in band_keys(signature)]
+        RentSignature.objects.bulk_create(signatures)
+        RentSignatureBand.objects.bulk_create(bands, batch_size=BATCH_SIZE)
+
+    shared = list(
+        RentSignatureBand.objects.order_by().values("band", "bucket").annotate(rents=Count("id"))
+        .filter(rents__gt=1).values_list("band", "bucket")
+    )
+    groups = defaultdict(set)
+    for start in range(0, len(shared), BATCH_SIZE):
+        keys = set(shared[start:start + BATCH_SIZE])
+        for rent_id, band, bucket in RentSignatureBand.objects.filter(
+            bucket__in=[bucket for _, bucket in keys]
+        ).values_list("rent_id", "band", "bucket"):
+            if (band, bucket) in keys:
+                groups[band, bucket].add(rent_id)
+
+    pairs = {pair for members in groups.values() for pair in combinations(sorted(members), 2)}
+    involved = sorted({rent_id for pair in pairs for rent_id in pair})
+    signatures = {}
+    for start in range(0, len(involved), BATCH_SIZE):
+        signatures.update(
+            (rent_id, unpack(data))
+            for rent_id, data in RentSignature.objects.filter(
+                rent_id__in=involved[start:start + BATCH_SIZE]
+            ).values_list("rent_id", "minhash")
+        )
+
+    originals = {}
+    for first, second in sorted(pairs):
+        if second in originals:
+            continue
+        score = similarity(signatures[first], signatures[second])
+        if score >= THRESHOLD:
+            originals[second] = (first, score)
+
+    RentSignature.objects.bulk_update(
+        [
+            RentSignature(rent_id=rent_id, duplicate_of_id=original, similarity=score)
+            for rent_id, (original, score) in originals.items()
+        ],
+        ["duplicate_of", "similarity"],
+        batch_size=BATCH_SIZE,
+    )
+    return len(rent_ids), len(originals)
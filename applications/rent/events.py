@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+HISTORY_SIZE = 1000
+# how often a stream checks the backend without a local wake-up, also the keep-alive interval
+POLL_INTERVAL = 15
+
+
+class InProcessBackend:
+    """
+    Keeps the last HISTORY_SIZE events in memory. Enough for a single
+    ASGI worker; with several use CacheBackend over a shared cache.
+    """
+
+    def __init__(self):
+        self._events = deque(maxlen=HISTORY_SIZE)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        with self._lock:
+            self._last_id += 1
+            self._events.append({**event, "id": self._last_id})
+
+    def last_id(self):
+        return self._last_id
+
+    def read(self, after_id):
+        with self._lock:
+            return [event for event in self._events if event["id"] > after_id]
+
+
+class CacheBackend:
+    """
+    Events in the Django cache, shared by all processes when CACHES
+    points to a shared backend (Redis, Memcached). Streams in other
+    processes pick new events up on their next poll.
+    """
+    LAST_ID_KEY = "booking_events:last_id"
+    TIMEOUT = 3600
+
+    def publish(self, event):
+        cache.add(self.LAST_ID_KEY, 0, None)
+        event_id = cache.incr(self.LAST_ID_KEY)
+        cache.set(f"booking_events:{event_id}", {**event, "id": event_id}, self.TIMEOUT)
+
+    def last_id(self):
+        return cache.get(self.LAST_ID_KEY, 0)
+
+    def read(self, after_id):
+        last_id = self.last_id()
+        # the counter starts over if the cache was flushed
+        after_id = max(min(after_id, last_id), last_id - HISTORY_SIZE)
+        keys = [f"booking_events:{event_id}" for event_id in range(after_id + 1, last_id + 1)]
+        found = cache.get_many(keys)
+        return [found[key] for key in keys if key in found]
+
+
+class BookingEventBroker:
+    """
+    Booking status changes for the SSE stream. Streams of this process
+    are woken up as soon as an event is published, events of other
+    processes (with a shared backend) are seen on the next poll.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._waiters = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        self.backend.publish(event)
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+
+    def last_id(self):
+        return self.backend.last_id()
+
+    def read(self, after_id, user_id):
+        """
+        Events after after_id concerning user_id (as tenant or owner),
+        and the id to continue from.
+        """
+        events = self.backend.read(after_id)
+        last_id = events[-1]["id"] if events else after_id
+        return [event for event in events if user_id in (event["tenant"], event["owner"])], last_id
+
+    def waiter(self):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        return waiter
+
+    def release(self, waiter):
+        with self._lock:
+            self._waiters.discard(waiter)
+
+    async def wait(self, waiter, timeout):
+        """
+        Waits for a publish in this process since waiter() was taken.
+        Returns False on timeout.
+        """
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+booking_events = BookingEventBroker(import_string(settings.BOOKING_EVENTS_BACKEND)())
+
+
+def publish_booking_event(booking_id, rent_id, tenant_id, owner_id, status, previous):
+    booking_events.publish({
+        "booking": booking_id,
+        "rent": rent_id,
+        "tenant": tenant_id,
+        "owner": owner_id,
+        "status": status,
+        "previous": previous,
+    })
+
+
+async def stream_booking_events(user_id, last_id):
+    """
+    Server-sent events for user_id after the event last_id.
+    """
+    yield "retry: 3000\n\n"
+    read = sync_to_async(booking_events.read, thread_sensitive=False)
+    while True:
+        # taken before reading, so a publish in between isn't missed
+        waiter = booking_events.waiter()
+        try:
+            events, last_id = await read(last_id, user_id)
+            for event in events:
+                yield f"id: {event['id']}\nevent: booking\ndata: {json.dumps(event)}\n\n"
+            if not events and not await booking_events.wait(waiter, POLL_INTERVAL):
+                yield ": keep-alive\n\n"
+        finally:
+            booking_events.release(waiter)
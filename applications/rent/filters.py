@@ -1,6 +1,8 @@
 import django_filters
 from django.contrib import admin
-from applications.rent.models import Rent
+from django.db.models import Q
+from rest_framework.filters import OrderingFilter
+from applications.rent.models import Rent, AuditEntry
 
 class RentFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
@@ -10,11 +12,43 @@ class RentFilter(django_filters.FilterSet):
     address = django_filters.CharFilter(lookup_expr="icontains")
     room_type = django_filters.CharFilter()
     city = django_filters.CharFilter(field_name="city", lookup_expr="iexact")
+    available_by = django_filters.DateFilter(field_name="next_available_from", lookup_expr="lte")
+    min_free_days = django_filters.NumberFilter(method="filter_min_free_days")
 
     class Meta:
         model = Rent
         fields = ["city", "room_type", "rooms_count"]
 
+    def filter_min_free_days(self, queryset, name, value):
+        # an empty free_window_days means free from next_available_from on
+        return queryset.filter(Q(free_window_days__isnull=True) | Q(free_window_days__gte=value))
+
+
+class AuditEntryFilter(django_filters.FilterSet):
+    since = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    until = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+    class Meta:
+        model = AuditEntry
+        fields = ["object_type", "object_id", "actor", "source", "action"]
+
+
+class RentOrderingFilter(OrderingFilter):
+    """
+    Adds ordering=recommended (precomputed rank_score) with id as a tie-breaker,
+    so the order is stable for keyset pagination.
+    """
+    aliases = {
+        "recommended": ["-rank_score", "-id"],
+        "-recommended": ["rank_score", "id"],
+    }
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params in self.aliases:
+            return self.aliases[params]
+        return super().get_ordering(request, queryset, view)
+
 
 class CityListFilter(admin.SimpleListFilter):
     title = "City"
@@ -90,3 +124,19 @@ class RoomTypeFilter(admin.SimpleListFilter):
         if value:
             return queryset.filter(room_type=value)
         return queryset
+
+
+class SuspectedDuplicateFilter(admin.SimpleListFilter):
+    title = "Suspected duplicate"
+    parameter_name = "duplicate"
+
+    def lookups(self, request, model_admin):
+        return [("yes", "Yes"), ("no", "No")]
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value == "yes":
+            return queryset.filter(signature__duplicate_of__isnull=False)
+        elif value == "no":
+            return queryset.exclude(signature__duplicate_of__isnull=False)
+        return queryset
@@ -0,0 +1,63 @@
+import math
+
+# zoom levels with a precomputed grid cell key on Rent (cell_z6, cell_z9, ...)
+ZOOM_LEVELS = (6, 9, 12, 15)
+MAX_ZOOM = 20
+# Web Mercator doesn't cover the poles
+MAX_LATITUDE = 85.05112878
+
+
+def cell_field(zoom):
+    return f"cell_z{zoom}"
+
+
+GEO_CELL_FIELDS = tuple(cell_field(zoom) for zoom in ZOOM_LEVELS)
+
+
+def tile_xy(lat, lng, zoom):
+    """
+    Slippy map (Web Mercator) tile coordinates of a point.
+    """
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lng + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return max(0, min(n - 1, x)), max(0, min(n - 1, y))
+
+
+def tile_key(lat, lng, zoom):
+    return "{}:{}".format(*tile_xy(lat, lng, zoom))
+
+
+def tile_bounds(x, y, zoom):
+    """
+    Returns (min_lng, min_lat, max_lng, max_lat) of a tile.
+    """
+    n = 2 ** zoom
+
+    def lat(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def grid_zoom(zoom):
+    """
+    Stored grid level used to cluster a map shown at the given zoom:
+    a few levels finer than the map tiles, so a screen holds a handful of cells.
+    """
+    levels = [level for level in ZOOM_LEVELS if level <= zoom + 3]
+    return max(levels) if levels else min(ZOOM_LEVELS)
+
+
+def snap_bbox(min_lng, min_lat, max_lng, max_lat, zoom):
+    """
+    Expands a bbox to whole tiles at the given zoom, so slightly different
+    viewports share the same tiles (and cache entries).
+    Returns the tile range (x0, y0, x1, y1) and the snapped bbox.
+    """
+    x0, y0 = tile_xy(max_lat, min_lng, zoom)
+    x1, y1 = tile_xy(min_lat, max_lng, zoom)
+    west, _, _, north = tile_bounds(x0, y0, zoom)
+    _, south, east, _ = tile_bounds(x1, y1, zoom)
+    return (x0, y0, x1, y1), (west, south, east, north)
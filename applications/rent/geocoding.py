@@ -0,0 +1,189 @@
+import csv
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from applications.rent.autocomplete import normalize, rent_autocomplete
+from applications.rent.geo import GEO_CELL_FIELDS
+from applications.rent.models import Rent, GeocodedAddress
+
+BATCH_SIZE = 200
+DEFAULT_WORKERS = 4
+FETCH_TIMEOUT = 10
+
+
+class GeocodingError(Exception):
+    """
+    Temporary provider failure (network, quota). The rent stays queued.
+    """
+
+
+def geocode_query(address, city):
+    return normalize(f"{address}, {city}")[:255]
+
+
+class FileProvider:
+    """
+    Coordinates from a local CSV file of "address, city",latitude,longitude
+    rows without a header (GEOCODING_FILE). For tests and offline imports.
+    """
+    name = "file"
+    rate_limit = None
+
+    def __init__(self, path=None):
+        self.path = path or settings.GEOCODING_FILE
+        self._points = None
+        self._lock = threading.Lock()
+
+    def geocode(self, query):
+        with self._lock:
+            if self._points is None:
+                with open(self.path, newline="", encoding="utf-8") as file:
+                    self._points = {
+                        normalize(row[0]): (float(row[1]), float(row[2])) for row in csv.reader(file) if row
+                    }
+        return self._points.get(query)
+
+
+class NominatimProvider:
+    """
+    OpenStreetMap Nominatim. The public instance allows one request per
+    second and asks for an identifying User-Agent (GEOCODING_USER_AGENT).
+    """
+    name = "nominatim"
+    rate_limit = 1
+    url = "https://nominatim.openstreetmap.org/search"
+
+    def geocode(self, query):
+        params = urllib.parse.urlencode({"q": query, "format": "json", "limit": 1})
+        request = urllib.request.Request(
+            f"{self.url}?{params}", headers={"User-Agent": settings.GEOCODING_USER_AGENT}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+                results = json.load(response)
+        except (OSError, ValueError) as exc:
+            raise GeocodingError(str(exc)) from exc
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+
+def get_provider():
+    return import_string(settings.GEOCODING_PROVIDER)()
+
+
+class RateLimiter:
+    """
+    Spaces wait() returns of all threads at least 1 / rate seconds apart.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def resolve(queries, provider, workers, limiter):
+    """
+    Looks the queries up through the provider in a thread pool and stores
+    the results, not found ones included. Returns the stored results by
+    query and the number of failed lookups, which are tried again later.
+    """
+    def lookup(query):
+        limiter.wait()
+        try:
+            return query, provider.geocode(query), True
+        except GeocodingError:
+            return query, None, False
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lookup, queries))
+
+    found = [
+        GeocodedAddress(
+            query=query,
+            latitude=point[0] if point else None,
+            longitude=point[1] if point else None,
+            provider=provider.name,
+        )
+        for query, point, ok in results if ok
+    ]
+    GeocodedAddress.objects.bulk_create(found, ignore_conflicts=True)
+    return {result.query: result for result in found}, len(results) - len(found)
+
+
+def apply_results(rent_ids, known):
+    """
+    Sets the coordinates of the still queued rents whose current address
+    has a result. Rents edited meanwhile are matched by their new address.
+    """
+    now = timezone.now()
+    rents = []
+    rows = Rent.objects.filter(id__in=rent_ids, needs_geocoding=True).values_list(
+        "id", "address", "city", "latitude", "longitude"
+    )
+    for rent_id, address, city, latitude, longitude in rows:
+        result = known.get(geocode_query(address, city))
+        if result is None:
+            continue
+        rent = Rent(id=rent_id, latitude=latitude, longitude=longitude, needs_geocoding=False, updated_at=now)
+        # a not found address keeps the coordinates it had
+        if result.latitude is not None:
+            rent.latitude, rent.longitude = result.latitude, result.longitude
+        rent.update_geo_cells()
+        rents.append(rent)
+
+    return Rent.objects.bulk_update(
+        rents, ["latitude", "longitude", "needs_geocoding", "updated_at", *GEO_CELL_FIELDS]
+    )
+
+
+def geocode_rents(rent_ids=None, provider=None, workers=DEFAULT_WORKERS, rate=None):
+    """
+    Fills the coordinates of the rents queued with needs_geocoding (only
+    the given ones if rent_ids isn't None). Each distinct address is
+    looked up once per batch, first in GeocodedAddress, then through the
+    provider at up to rate requests per second (default: the provider's
+    limit). Without a provider only cached addresses are resolved.
+    Returns the number of updated rents and of failed lookups.
+    """
+    queryset = Rent.objects.filter(needs_geocoding=True).order_by("id")
+    if rent_ids is not None:
+        queryset = queryset.filter(id__in=rent_ids)
+    rows = list(queryset.values_list("id", "address", "city"))
+    limiter = RateLimiter(rate or getattr(provider, "rate_limit", None))
+
+    updated = failed = 0
+    for start in range(0, len(rows), BATCH_SIZE):
+        chunk = rows[start:start + BATCH_SIZE]
+        queries = {geocode_query(address, city) for _, address, city in chunk}
+        known = {result.query: result for result in GeocodedAddress.objects.filter(query__in=queries)}
+
+        missing = sorted(queries - known.keys())
+        if provider is not None and missing:
+            resolved, errors = resolve(missing, provider, workers, limiter)
+            known.update(resolved)
+            failed += errors
+
+        updated += apply_results([rent_id for rent_id, _, _ in chunk], known)
+
+    if updated:
+        # bulk_update skips the signals, the map caches follow this version
+        rent_autocomplete.rents_updated()
+    return updated, failed
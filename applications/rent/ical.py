@@ -0,0 +1,251 @@
+import http.client
+import ipaddress
+import socket
+import ssl
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from applications.rent.availability import update_availability
+from applications.rent.models import Booking, CalendarHold, RentCalendar
+
+PRODID = "-//rental-platform//calendar//EN"
+# past stays kept in the feed
+FEED_HISTORY = timedelta(days=30)
+FETCH_TIMEOUT = 10
+# larger imports are refused, a calendar of a few years of stays is far less
+MAX_ICS_BYTES = 2 * 1024 * 1024
+
+
+def escape_text(value):
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def fold(line):
+    """
+    Splits a content line into 75 octet pieces (RFC 5545, 3.1).
+    """
+    data = line.encode()
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # don't cut a multi-byte character
+        while cut and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+    parts.append(data)
+    return b"\r\n ".join(parts).decode()
+
+
+def render_calendar(name, bookings):
+    """
+    VCALENDAR with one all-day busy event per (id, check_in, check_out,
+    status, created_at) booking; pending bookings are TENTATIVE.
+    """
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+    ]
+    for booking_id, check_in, check_out, status, created_at in bookings:
+        confirmed = status == Booking.Status.CONFIRMED
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:booking-{booking_id}@rental-platform",
+            f"DTSTAMP:{created_at.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}",
+            f"DTSTART;VALUE=DATE:{check_in:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{check_out:%Y%m%d}",
+            f"SUMMARY:{'Booked' if confirmed else 'Reserved'}",
+            f"STATUS:{'CONFIRMED' if confirmed else 'TENTATIVE'}",
+            "TRANSP:OPAQUE",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "".join(fold(line) + "\r\n" for line in lines)
+
+
+def build_feed(rent_id, name):
+    bookings = Booking.objects.filter(
+        rent_id=rent_id,
+        status__in=[Booking.Status.PENDING, Booking.Status.CONFIRMED],
+        check_out__gte=timezone.localdate() - FEED_HISTORY,
+    ).order_by("check_in").values_list("id", "check_in", "check_out", "status", "created_at")
+    return render_calendar(name, bookings)
+
+
+def parse_date(value):
+    # DATE (20300101) or DATE-TIME (20300101T140000[Z]); holds are whole days
+    return datetime.strptime(value[:8], "%Y%m%d").date()
+
+
+def parse_calendar(text):
+    """
+    VEVENTs of an iCalendar document as (uid, start, end, summary),
+    without cancelled and malformed ones. A missing DTEND means one day.
+    """
+    lines = []
+    for line in text.replace("\r\n", "\n").split("\n"):
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        else:
+            lines.append(line)
+
+    events = []
+    event = None
+    for line in lines:
+        name, _, value = line.partition(":")
+        name = name.upper().split(";")[0]
+        if name == "BEGIN" and value.strip().upper() == "VEVENT":
+            event = {}
+        elif name == "END" and value.strip().upper() == "VEVENT" and event is not None:
+            try:
+                start = parse_date(event["DTSTART"])
+                end = parse_date(event["DTEND"]) if "DTEND" in event else start + timedelta(days=1)
+            except (KeyError, ValueError):
+                start = end = None
+            if start and end > start and event.get("STATUS", "").upper() != "CANCELLED":
+                uid = event.get("UID") or f"{start:%Y%m%d}-{end:%Y%m%d}"
+                events.append((uid[:255], start, end, event.get("SUMMARY", "")[:255]))
+            event = None
+        elif event is not None and name in ("UID", "DTSTART", "DTEND", "SUMMARY", "STATUS"):
+            event[name] = value.strip()
+    return events
+
+
+def import_holds(rent_id, text):
+    """
+    Replaces the holds of a rent with the events of an external calendar
+    that haven't ended yet. Returns the number of holds.
+    """
+    today = timezone.localdate()
+    holds = [
+        CalendarHold(rent_id=rent_id, uid=uid, start=start, end=end, summary=summary)
+        for uid, start, end, summary in parse_calendar(text)
+        if end > today
+    ]
+    with transaction.atomic():
+        CalendarHold.objects.filter(rent_id=rent_id).delete()
+        CalendarHold.objects.bulk_create(holds, ignore_conflicts=True)
+        transaction.on_commit(lambda: update_availability([rent_id]), robust=True)
+    return len(holds)
+
+
+def check_address(address):
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    if not ip.is_global or ip.is_multicast:
+        raise ValueError(f"{address} isn't a public address.")
+
+
+def check_import_url(url):
+    """
+    Raises ValueError unless url is http(s) and its host resolves to
+    public addresses only: the server fetches it, so it mustn't reach
+    localhost, the private network or the cloud metadata address.
+    """
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("Only http and https URLs can be imported.")
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port or 443, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError) as exc:
+        raise ValueError(f"{parts.hostname} can't be resolved.") from exc
+    for info in infos:
+        check_address(info[4][0])
+
+
+def check_peer(sock):
+    try:
+        check_address(sock.getpeername()[0])
+    except ValueError:
+        sock.close()
+        raise
+
+
+class PublicHTTPConnection(http.client.HTTPConnection):
+    # the host may resolve differently by now (DNS rebinding): check the peer
+    def connect(self):
+        super().connect()
+        check_peer(self.sock)
+
+
+class PublicHTTPSConnection(http.client.HTTPSConnection):
+    def connect(self):
+        super().connect()
+        check_peer(self.sock)
+
+
+class PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(PublicHTTPConnection, req)
+
+
+class PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(PublicHTTPSConnection, req, context=ssl.create_default_context())
+
+
+class PublicRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_import_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+# no proxies from the environment: the connected peer is the checked host
+opener = urllib.request.build_opener(
+    urllib.request.ProxyHandler({}), PublicHTTPHandler, PublicHTTPSHandler, PublicRedirectHandler
+)
+
+
+def fetch_calendar(url, etag=""):
+    """
+    Body and ETag of an external calendar, None if it's unchanged since
+    etag. Only public hosts are fetched, redirects included, and bodies
+    over MAX_ICS_BYTES raise ValueError.
+    """
+    check_import_url(url)
+    request = urllib.request.Request(url, headers={"User-Agent": "rental-platform"})
+    if etag:
+        request.add_header("If-None-Match", etag)
+    try:
+        with opener.open(request, timeout=FETCH_TIMEOUT) as response:
+            data = response.read(MAX_ICS_BYTES + 1)
+            etag = response.headers.get("ETag", "")
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return None
+        raise
+    if len(data) > MAX_ICS_BYTES:
+        raise ValueError(f"The calendar is larger than {MAX_ICS_BYTES} bytes.")
+    return data.decode("utf-8", errors="replace"), etag
+
+
+def sync_calendar(calendar):
+    """
+    Fetches calendar.import_url (conditionally, with the stored ETag) and
+    imports it. Returns the number of holds, None if it didn't change.
+    """
+    fetched = fetch_calendar(calendar.import_url, calendar.import_etag)
+    if fetched is None:
+        return None
+    text, etag = fetched
+
+    count = import_holds(calendar.rent_id, text)
+    calendar.import_etag = etag[:255]
+    calendar.imported_at = timezone.now()
+    calendar.save(update_fields=["import_etag", "imported_at"])
+    return count
+
+
+def bump_calendar_versions(rent_ids):
+    RentCalendar.objects.filter(rent_id__in=rent_ids).update(version=F("version") + 1)
@@ -0,0 +1,93 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from applications.rent.models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+
+def get_request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.md5(repr((request.method, request.path, body)).encode()).hexdigest()
+
+
+def reserve_key(user, key, request_hash):
+    """
+    Inserts the key as "in progress", returns (row, created) like
+    get_or_create. Rows older than IDEMPOTENCY_KEY_TTL, and rows still
+    in progress after IDEMPOTENCY_KEY_LEASE (their worker died before it
+    could store or drop them), are dropped and the key is reserved again.
+    """
+    now = timezone.now()
+    expired_before = now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    lease_expired_before = now - timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE)
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, request_hash=request_hash), True
+        except IntegrityError:
+            stored = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if stored is None:
+                continue
+            if stored.created_at >= (lease_expired_before if stored.status_code is None else expired_before):
+                return stored, False
+            stored.delete()
+    return IdempotencyKey.objects.get(user=user, key=key), False
+
+
+def idempotent(view_method):
+    """
+    Replays the stored response when a request is retried with the same
+    Idempotency-Key header, without running the view again. Keys are per
+    user; reusing one for a different request is rejected. Responses that
+    end in an exception or a 5xx aren't stored, so those can be retried.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"detail": f"Idempotency-Key is longer than {MAX_KEY_LENGTH} characters."}, status=400)
+
+        request_hash = get_request_hash(request)
+        stored, created = reserve_key(request.user, key, request_hash)
+
+        if not created:
+            if stored.request_hash != request_hash:
+                return Response(
+                    {"detail": "Idempotency-Key уже использован для другого запроса."},
+                    status=422,
+                )
+            if stored.status_code is None:
+                return Response({"detail": "Запрос с этим Idempotency-Key ещё выполняется."}, status=409)
+
+            response = Response(stored.response, status=stored.status_code)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        # by pk: after an expired lease the key may belong to a retry by now
+        reserved = IdempotencyKey.objects.filter(pk=stored.pk)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            reserved.delete()
+            raise
+
+        if response.status_code >= 500:
+            reserved.delete()
+        else:
+            reserved.update(
+                status_code=response.status_code, response=getattr(response, "data", None)
+            )
+        return response
+
+    return wrapper
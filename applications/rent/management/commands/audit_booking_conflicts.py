@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from applications.rent.audit import collect_audit
+from applications.rent.conflicts import audit_bookings
+from applications.rent.models import AuditEntry
+
+
+class Command(BaseCommand):
+    help = "Report overlapping PENDING/CONFIRMED bookings, optionally declining the later pending ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rent", type=int, action="append", help="only these rent ids")
+        parser.add_argument("--workers", type=int, default=1, help="worker processes for the sweep")
+        parser.add_argument("--decline", action="store_true", help="decline the later PENDING booking of each conflict")
+        parser.add_argument("--json", action="store_true", help="print the whole report as JSON")
+
+    def handle(self, *args, **options):
+        with collect_audit(AuditEntry.Source.COMMAND):
+            report = audit_bookings(options["rent"], workers=options["workers"], decline=options["decline"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        for conflict in report["conflicts"]:
+            first, second = conflict["bookings"]
+            self.stdout.write(
+                f"Rent #{conflict['rent']}: booking #{first['id']} ({first['status']}, "
+                f"{first['check_in']}–{first['check_out']}) overlaps #{second['id']} ({second['status']}, "
+                f"{second['check_in']}–{second['check_out']}) by {conflict['overlap_nights']} nights"
+            )
+        summary = (
+            f"Checked {report['bookings']} bookings of {report['rents']} rents: "
+            f"{len(report['conflicts'])} conflicts, "
+        )
+        if options["decline"]:
+            summary += f"declined {len(report['declined'])} pending bookings."
+        else:
+            summary += f"{len(report['to_decline'])} pending bookings to decline (--decline)."
+        style = self.style.WARNING if report["conflicts"] else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,66 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+
+from Finale_Project.renderers import FastJSONRenderer, MessagePackRenderer
+from applications.rent.models import Rent
+from applications.rent.serializers import RentSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare bytes and CPU per response of the API renderers on a rent list payload (no database needed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="rents per response")
+        parser.add_argument("--repeat", type=int, default=200, help="responses rendered per renderer")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        rents = []
+        for i in range(options["rows"]):
+            rent = Rent(
+                id=i + 1,
+                owner_id=1,
+                title=f"Квартира в центре #{i}",
+                description="Светлая квартира рядом с парком. " * 10,
+                city="Berlin",
+                address=f"Hauptstraße {i}",
+                latitude=52.52 + i / 1000,
+                longitude=13.40 + i / 1000,
+                price=Decimal("850.00") + i,
+                rooms_count=2,
+                room_type="STUDIO",
+                created_at=now,
+                updated_at=now,
+            )
+            rent.avg_rating = 4.25
+            rents.append(rent)
+
+        default_serializer = type(
+            "DefaultRentSerializer",
+            (RentSerializer,),
+            {"serializer_field_mapping": ModelSerializer.serializer_field_mapping},
+        )
+        for serializer_class in (default_serializer, RentSerializer):
+            start = time.process_time()
+            for _ in range(options["repeat"]):
+                data = serializer_class(rents, many=True).data
+            cpu_ms = (time.process_time() - start) * 1000 / options["repeat"]
+            self.stdout.write(f"{serializer_class.__name__:<22} {options['rows']:>5} rents {cpu_ms:>8.3f} ms CPU/response")
+        self.stdout.write("")
+
+        baseline = None
+        for renderer in (JSONRenderer(), FastJSONRenderer(), MessagePackRenderer()):
+            start = time.process_time()
+            for _ in range(options["repeat"]):
+                content = renderer.render(data, renderer.media_type, {})
+            cpu_ms = (time.process_time() - start) * 1000 / options["repeat"]
+            baseline = baseline or cpu_ms
+            self.stdout.write(
+                f"{type(renderer).__name__:<22} {len(content):>8} bytes "
+                f"{cpu_ms:>8.3f} ms CPU/response  x{baseline / cpu_ms:.1f}"
+            )
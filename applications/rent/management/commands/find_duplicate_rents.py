@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from applications.rent.duplicates import rebuild_signatures, sign_queued_rents
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-sign all rents and flag near-duplicates from scratch (after imports or on first deploy), "
+        "or with --queued only the created and edited ones (run every few minutes)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queued", action="store_true", help="only rents queued since the last run")
+
+    def handle(self, *args, **options):
+        if options["queued"]:
+            signed, flagged = sign_queued_rents()
+        else:
+            signed, flagged = rebuild_signatures()
+        self.stdout.write(self.style.SUCCESS(f"Signed {signed} rents, {flagged} suspected duplicates."))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Finale_Project.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema served by /swagger/ and /redoc/ (run at build time)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=settings.OPENAPI_SCHEMA_FILE, help="output file")
+
+    def handle(self, *args, **options):
+        content = generate_schema()
+        with open(options["output"], "wb") as f:
+            f.write(content)
+        self.stdout.write(self.style.SUCCESS(f"Schema written to {options['output']}."))
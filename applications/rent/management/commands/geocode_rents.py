@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from applications.rent.geocoding import DEFAULT_WORKERS, geocode_rents, get_provider
+from applications.rent.models import Rent, GeocodedAddress
+
+
+class Command(BaseCommand):
+    help = "Fill latitude/longitude of rents queued for geocoding (run every few minutes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel provider requests")
+        parser.add_argument("--rate", type=float, help="max provider requests per second")
+        parser.add_argument(
+            "--missing", action="store_true",
+            help="also queue every rent without coordinates and retry addresses that weren't found",
+        )
+
+    def handle(self, *args, **options):
+        if options["missing"]:
+            GeocodedAddress.objects.filter(latitude__isnull=True).delete()
+            queued = Rent.objects.filter(latitude__isnull=True, needs_geocoding=False).update(needs_geocoding=True)
+            self.stdout.write(f"Queued {queued} rents without coordinates.")
+
+        updated, failed = geocode_rents(provider=get_provider(), workers=options["workers"], rate=options["rate"])
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {updated} rents, {failed} lookups failed."))
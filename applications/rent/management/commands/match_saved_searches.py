@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from applications.rent.saved_searches import match_queued_rents
+
+
+class Command(BaseCommand):
+    help = "Match created and edited rents against the saved searches (run every few minutes)"
+
+    def handle(self, *args, **options):
+        rents, matches = match_queued_rents()
+        self.stdout.write(self.style.SUCCESS(f"Matched {rents} rents, {matches} matches."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from applications.rent.availability import update_availability
+
+
+class Command(BaseCommand):
+    help = "Recompute next_available_from for rents whose date has passed (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="recompute every rent")
+
+    def handle(self, *args, **options):
+        updated = update_availability(stale_only=not options["all"])
+        self.stdout.write(self.style.SUCCESS(f"Updated availability for {updated} rents."))
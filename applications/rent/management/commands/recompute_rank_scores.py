@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from applications.rent.ranking import update_rank_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute rank_score for all rents (run periodically, recency decays over time)"
+
+    def handle(self, *args, **options):
+        updated = update_rank_scores()
+        self.stdout.write(self.style.SUCCESS(f"Updated rank_score for {updated} rents."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from applications.rent.ical import sync_calendar
+from applications.rent.models import RentCalendar
+
+
+class Command(BaseCommand):
+    help = "Import the external calendars of rents as holds (run every few minutes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rent", type=int, action="append", help="only these rent ids")
+
+    def handle(self, *args, **options):
+        calendars = RentCalendar.objects.exclude(import_url="").order_by("rent_id")
+        if options["rent"]:
+            calendars = calendars.filter(rent_id__in=options["rent"])
+
+        imported = unchanged = failed = 0
+        for calendar in calendars.iterator():
+            try:
+                count = sync_calendar(calendar)
+            except (OSError, ValueError) as exc:
+                # one unreachable calendar doesn't stop the others
+                failed += 1
+                self.stderr.write(f"Rent #{calendar.rent_id}: {exc}")
+                continue
+            if count is None:
+                unchanged += 1
+            else:
+                imported += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} calendars, {unchanged} unchanged, {failed} failed."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0006_alter_rent_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Review', 'verbose_name_plural': 'Reviews'},
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['tenant', 'rent', 'status'], name='rent_bookin_tenant__80d088_idx'),
+        ),
+    ]
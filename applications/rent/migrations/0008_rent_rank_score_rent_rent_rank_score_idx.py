@@ -0,0 +1,63 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:45
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def compute_rank_score(created_at, review_avg, review_count, demand, now):
+    # rent.ranking.compute_rank_score as of this migration
+    rating = (3.5 * 5 + (review_avg or 0) * review_count) / (5 + review_count)
+    reviews = min(math.log1p(review_count) / math.log1p(50), 1)
+    demand = min(math.log1p(demand) / math.log1p(20), 1)
+    recency = 0.5 ** (max((now - created_at).total_seconds() / 86400, 0) / 30)
+    return round(0.5 * rating / 5 + 0.2 * reviews + 0.2 * demand + 0.1 * recency, 6)
+
+
+def fill_rank_scores(apps, schema_editor):
+    Rent = apps.get_model("rent", "Rent")
+    Booking = apps.get_model("rent", "Booking")
+    now = timezone.now()
+
+    demand = Booking.objects.filter(
+        rent=OuterRef("pk"),
+        status__in=["PENDING", "CONFIRMED"],
+        created_at__gte=now - timedelta(days=90),
+    ).order_by().values("rent").annotate(total=Count("id")).values("total")
+    rows = Rent.objects.order_by().annotate(
+        review_avg=Avg("reviews__rating"),
+        review_count=Count("reviews"),
+        demand=Coalesce(Subquery(demand, output_field=IntegerField()), 0),
+    ).values_list("id", "created_at", "review_avg", "review_count", "demand")
+
+    rents = [
+        Rent(id=rent_id, rank_score=compute_rank_score(created_at, review_avg, review_count, demand, now))
+        for rent_id, created_at, review_avg, review_count, demand in rows.iterator()
+    ]
+    Rent.objects.bulk_update(rents, ["rank_score"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0007_alter_review_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rent',
+            name='rank_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Rank score'),
+        ),
+        migrations.AddIndex(
+            model_name='rent',
+            index=models.Index(fields=['-rank_score', '-id'], name='rent_rank_score_idx'),
+        ),
+        migrations.RunPython(fill_rank_scores, migrations.RunPython.noop),
+    ]
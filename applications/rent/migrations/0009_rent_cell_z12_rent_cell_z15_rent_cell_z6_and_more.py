@@ -0,0 +1,64 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:46
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+
+# rent.geo as of this migration
+ZOOM_LEVELS = (6, 9, 12, 15)
+MAX_LATITUDE = 85.05112878
+
+
+def tile_key(lat, lng, zoom):
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lng + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return f"{max(0, min(n - 1, x))}:{max(0, min(n - 1, y))}"
+
+
+def fill_geo_cells(apps, schema_editor):
+    Rent = apps.get_model("rent", "Rent")
+    fields = [f"cell_z{zoom}" for zoom in ZOOM_LEVELS]
+    rents = Rent.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for rent in rents.iterator():
+        for zoom, field in zip(ZOOM_LEVELS, fields):
+            setattr(rent, field, tile_key(rent.latitude, rent.longitude, zoom))
+        rent.save(update_fields=fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0008_rent_rank_score_rent_rent_rank_score_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rent',
+            name='cell_z12',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='rent',
+            name='cell_z15',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='rent',
+            name='cell_z6',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='rent',
+            name='cell_z9',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='rent',
+            index=models.Index(fields=['latitude', 'longitude'], name='rent_coordinates_idx'),
+        ),
+        migrations.RunPython(fill_geo_cells, migrations.RunPython.noop),
+    ]
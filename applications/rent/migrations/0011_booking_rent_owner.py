@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_rent_owner(apps, schema_editor):
+    Booking = apps.get_model("rent", "Booking")
+    Rent = apps.get_model("rent", "Rent")
+    Booking.objects.update(rent_owner=Subquery(Rent.objects.filter(pk=OuterRef("rent_id")).values("owner_id")[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0010_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='rent_owner',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='owned_bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_rent_owner, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='rent_owner',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='owned_bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['rent_owner', 'status', 'check_in'], name='rent_bookin_rent_ow_274147_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:06
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def compute_availability(bookings, today):
+    # rent.availability.compute_availability as of this migration
+    free_from = today
+    for check_in, check_out in bookings:
+        if check_in > free_from:
+            return free_from, (check_in - free_from).days
+        free_from = max(free_from, check_out)
+    return free_from, None
+
+
+def fill_availability(apps, schema_editor):
+    Rent = apps.get_model("rent", "Rent")
+    Booking = apps.get_model("rent", "Booking")
+    today = timezone.localdate()
+    now = timezone.now()
+
+    bookings = {}
+    for rent_id, check_in, check_out in Booking.objects.filter(
+        status__in=["PENDING", "CONFIRMED"], check_out__gt=today
+    ).order_by("rent_id", "check_in").values_list("rent_id", "check_in", "check_out"):
+        bookings.setdefault(rent_id, []).append((check_in, check_out))
+
+    for rent in Rent.objects.only("id").iterator():
+        rent.next_available_from, rent.free_window_days = compute_availability(bookings.get(rent.id, []), today)
+        rent.availability_updated_at = now
+        rent.save(update_fields=["next_available_from", "free_window_days", "availability_updated_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0011_booking_rent_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rent',
+            name='availability_updated_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='rent',
+            name='free_window_days',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='rent',
+            name='next_available_from',
+            field=models.DateField(db_index=True, editable=False, null=True, verbose_name='Available from'),
+        ),
+        migrations.RunPython(fill_availability, migrations.RunPython.noop),
+    ]
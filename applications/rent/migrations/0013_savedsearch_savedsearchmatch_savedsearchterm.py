@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0012_rent_availability_updated_at_rent_free_window_days_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('city', models.CharField(blank=True, max_length=50)),
+                ('room_type', models.CharField(blank=True, choices=[('SINGLE_ROOM', 'Single room (studio)'), ('ONE_BEDROOM', 'One room with separate bedroom'), ('TWO_BEDROOM', 'Two rooms with shared bathroom'), ('TWO_BEDROOM_ENSUITE', 'Two rooms with private bathrooms'), ('THREE_BEDROOM', 'Three rooms'), ('SUITE', 'Suite / Apartment'), ('SHARED_ROOM', 'Shared room / Bed space'), ('PRIVATE_ROOM_IN_SHARED', 'Private room in shared apartment'), ('LOFT', 'Loft / Attic'), ('STUDIO', 'Studio')], max_length=45)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('min_rooms', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('max_rooms', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Saved search',
+                'verbose_name_plural': 'Saved searches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('rent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rent.rent')),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='rent.savedsearch')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('search', 'rent')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='rent.savedsearch')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'search'], name='rent_saveds_term_9eea66_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:11
+
+import applications.rent.models.calendar
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_calendars(apps, schema_editor):
+    Rent = apps.get_model("rent", "Rent")
+    RentCalendar = apps.get_model("rent", "RentCalendar")
+    RentCalendar.objects.bulk_create(
+        (RentCalendar(rent_id=rent_id) for rent_id in Rent.objects.values_list("id", flat=True).iterator()),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0013_savedsearch_savedsearchmatch_savedsearchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentCalendar',
+            fields=[
+                ('rent', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calendar', serialize=False, to='rent.rent')),
+                ('token', models.CharField(default=applications.rent.models.calendar.new_calendar_token, max_length=64, unique=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('import_url', models.URLField(blank=True)),
+                ('import_etag', models.CharField(blank=True, max_length=255)),
+                ('imported_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CalendarHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.CharField(max_length=255)),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('summary', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='rent.rent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['rent', 'start'], name='rent_calend_rent_id_27a54f_idx')],
+                'unique_together': {('rent', 'uid')},
+            },
+        ),
+        migrations.RunPython(create_calendars, migrations.RunPython.noop),
+    ]
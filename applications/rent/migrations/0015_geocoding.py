@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+def queue_missing_coordinates(apps, schema_editor):
+    Rent = apps.get_model("rent", "Rent")
+    Rent.objects.filter(latitude__isnull=True).update(needs_geocoding=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0014_rent_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedAddress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255, unique=True)),
+                ('latitude', models.FloatField(null=True)),
+                ('longitude', models.FloatField(null=True)),
+                ('provider', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Geocoded address',
+                'verbose_name_plural': 'Geocoded addresses',
+            },
+        ),
+        migrations.AddField(
+            model_name='rent',
+            name='needs_geocoding',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(queue_missing_coordinates, migrations.RunPython.noop),
+    ]
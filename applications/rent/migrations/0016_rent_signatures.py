@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0015_geocoding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentSignature',
+            fields=[
+                ('rent', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='rent.rent')),
+                ('minhash', models.BinaryField()),
+                ('text_hash', models.CharField(max_length=32)),
+                ('similarity', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rent.rent')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RentSignatureBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('rent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rent.rent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'band'], name='rent_rentsi_bucket_a5c1f5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:37
+
+from django.db import migrations, models
+
+
+def queue_unsigned_rents(apps, schema_editor):
+    Rent = apps.get_model("rent", "Rent")
+    Rent.objects.filter(signature__isnull=True).update(needs_signature=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0017_audit_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rent',
+            name='needs_signature',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(queue_unsigned_rents, migrations.RunPython.noop),
+    ]
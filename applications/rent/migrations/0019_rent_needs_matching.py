@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rent', '0018_rent_needs_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rent',
+            name='needs_matching',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+    ]
@@ -1,5 +1,11 @@
 from .rent import Rent
 from .booking import Booking
 from .review import Review
+from .idempotency import IdempotencyKey
+from .saved_search import SavedSearch, SavedSearchTerm, SavedSearchMatch
+from .calendar import RentCalendar, CalendarHold
+from .geocode import GeocodedAddress
+from .duplicate import RentSignature, RentSignatureBand
+from .audit import AuditEntry
 
 __all__ = ["Rent", "Booking"]
\ No newline at end of file
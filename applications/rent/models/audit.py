@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class AuditEntryQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise ValueError("Audit entries can't be changed.")
+
+    def delete(self):
+        raise ValueError("Audit entries can't be deleted.")
+
+
+class AuditEntry(models.Model):
+    """
+    One change of an audited object (see rent.audit): who made it, from
+    where and the changed fields as {field: [old, new]}. Append-only.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = "create", "Create"
+        UPDATE = "update", "Update"
+        DELETE = "delete", "Delete"
+
+    class Source(models.TextChoices):
+        API = "api", "API"
+        ADMIN = "admin", "Admin"
+        COMMAND = "command", "Command"
+
+    object_type = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=Action.choices)
+    changes = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    source = models.CharField(max_length=10, choices=Source.choices)
+    # when the change was made, not when the buffered entry was written
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = AuditEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Audit entry"
+        verbose_name_plural = "Audit log"
+        indexes = [
+            models.Index(fields=["object_type", "object_id", "created_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Audit entries can't be changed.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Audit entries can't be deleted.")
+
+    def __str__(self):
+        return f"{self.action} {self.object_type} #{self.object_id}"
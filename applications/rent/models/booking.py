@@ -3,6 +3,8 @@ from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from .calendar import CalendarHold
+
 
 class Booking(models.Model):
     class Status(models.TextChoices):
@@ -13,11 +15,34 @@ class Booking(models.Model):
 
     rent = models.ForeignKey("rent.Rent", on_delete=models.CASCADE, related_name="bookings")
     tenant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="bookings")
+    # copy of rent.owner for landlord queries without the join, kept in sync by save() and signals
+    rent_owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="owned_bookings",
+        editable=False,
+        db_index=False,
+    )
     check_in = models.DateField()
     check_out = models.DateField()
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["tenant", "rent", "status"]),
+            # landlord's bookings by status and date; also serves as the rent_owner foreign key index
+            models.Index(fields=["rent_owner", "status", "check_in"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.rent_owner_id is None or Booking.rent.is_cached(self):
+            self.rent_owner_id = self.rent.owner_id
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "rent_owner"}
+        super().save(*args, **kwargs)
+
     def can_cancel(self):
         return timezone.now().date() < self.check_in - timezone.timedelta(days=1)
 
@@ -31,7 +56,7 @@ class Booking(models.Model):
         if self.pk:
             overlapping = overlapping.exclude(pk=self.pk)
 
-        if overlapping.exists():
+        if overlapping.exists() or CalendarHold.overlapping(self.rent, self.check_in, self.check_out).exists():
             raise ValidationError("⛔ These dates are already in use for the selected accommodation.")
 
     def __str__(self):
@@ -0,0 +1,47 @@
+import secrets
+
+from django.db import models
+
+
+def new_calendar_token():
+    return secrets.token_urlsafe(32)
+
+
+class RentCalendar(models.Model):
+    """
+    iCalendar sync of a rent: the token of its public .ics feed, a version
+    bumped on every booking change (the feed's cache key and ETag) and
+    an optional external calendar imported as holds.
+    """
+    rent = models.OneToOneField("rent.Rent", on_delete=models.CASCADE, primary_key=True, related_name="calendar")
+    token = models.CharField(max_length=64, unique=True, default=new_calendar_token)
+    version = models.PositiveIntegerField(default=0)
+    import_url = models.URLField(blank=True)
+    import_etag = models.CharField(max_length=255, blank=True)
+    imported_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Calendar of rent #{self.rent_id}"
+
+
+class CalendarHold(models.Model):
+    """
+    Busy dates imported from an external calendar. end is exclusive like
+    Booking.check_out; the overlap checks treat holds like active bookings.
+    """
+    rent = models.ForeignKey("rent.Rent", on_delete=models.CASCADE, related_name="holds")
+    uid = models.CharField(max_length=255)
+    start = models.DateField()
+    end = models.DateField()
+    summary = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("rent", "uid")
+        indexes = [
+            models.Index(fields=["rent", "start"]),
+        ]
+
+    @classmethod
+    def overlapping(cls, rent, check_in, check_out):
+        return cls.objects.filter(rent=rent, start__lt=check_out, end__gt=check_in)
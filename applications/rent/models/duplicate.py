@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class RentSignature(models.Model):
+    """
+    MinHash signature of a rent's text and address (see rent.duplicates)
+    and the earlier rent it looks like a copy of, if any.
+    """
+    rent = models.OneToOneField("rent.Rent", on_delete=models.CASCADE, primary_key=True, related_name="signature")
+    minhash = models.BinaryField()
+    # of the signed text, to skip saves that didn't change it
+    text_hash = models.CharField(max_length=32)
+    duplicate_of = models.ForeignKey(
+        "rent.Rent", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    # estimated Jaccard similarity to duplicate_of
+    similarity = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Signature of rent #{self.rent_id}"
+
+
+class RentSignatureBand(models.Model):
+    """
+    LSH bucket of one band of a RentSignature. Rents sharing a bucket
+    in any band are the duplicate candidates.
+    """
+    rent = models.ForeignKey("rent.Rent", on_delete=models.CASCADE, related_name="+")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["bucket", "band"]),
+        ]
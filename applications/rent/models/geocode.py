@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class GeocodedAddress(models.Model):
+    """
+    Result of geocoding a normalized "address, city" query, shared by all
+    rents with that address. Empty coordinates mean the provider didn't
+    find it, so it isn't asked again.
+    """
+    query = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    provider = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Geocoded address"
+        verbose_name_plural = "Geocoded addresses"
+
+    def __str__(self):
+        return self.query
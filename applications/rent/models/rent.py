@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from applications.rent.choices.room_type import RoomType
+from applications.rent.geo import ZOOM_LEVELS, GEO_CELL_FIELDS, cell_field, tile_key
 from django.utils.translation import gettext_lazy as _
 
 
@@ -27,6 +28,23 @@ class Rent(models.Model):
     is_active = models.BooleanField(_("Is active"), default=True)
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
+    rank_score = models.FloatField(_("Rank score"), default=0, editable=False)
+    # map grid cells "x:y" at the zoom levels in geo.ZOOM_LEVELS, used for clustering
+    cell_z6 = models.CharField(max_length=16, blank=True, editable=False)
+    cell_z9 = models.CharField(max_length=16, blank=True, editable=False)
+    cell_z12 = models.CharField(max_length=16, blank=True, editable=False)
+    cell_z15 = models.CharField(max_length=16, blank=True, editable=False)
+    # first free date and the length of that free window in days (empty if open-ended),
+    # maintained by rent.availability
+    next_available_from = models.DateField(_("Available from"), null=True, editable=False, db_index=True)
+    free_window_days = models.PositiveIntegerField(null=True, editable=False)
+    availability_updated_at = models.DateTimeField(null=True, editable=False)
+    # set when the address changed without new coordinates, cleared by rent.geocoding
+    needs_geocoding = models.BooleanField(default=False, editable=False, db_index=True)
+    # set when the signed text may have changed, cleared by rent.duplicates
+    needs_signature = models.BooleanField(default=False, editable=False, db_index=True)
+    # set when the fields saved searches filter on may have changed, cleared by rent.saved_searches
+    needs_matching = models.BooleanField(default=False, editable=False, db_index=True)
 
     class Meta:
         verbose_name = _("Announcement")
@@ -34,6 +52,60 @@ class Rent(models.Model):
         ordering = ["-created_at"]
         db_table = "rent"
         default_permissions = ("add", "change", "delete", "view")
+        indexes = [
+            models.Index(fields=["-rank_score", "-id"], name="rent_rank_score_idx"),
+            models.Index(fields=["latitude", "longitude"], name="rent_coordinates_idx"),
+        ]
+
+    # the text rent.duplicates signs
+    SIGNED_FIELDS = {"title", "description", "address", "city"}
+    # the fields saved searches filter on
+    MATCHED_FIELDS = {"city", "room_type", "price", "rooms_count", "is_active"}
+
+    def update_geo_cells(self):
+        has_coordinates = self.latitude is not None and self.longitude is not None
+        for zoom in ZOOM_LEVELS:
+            key = tile_key(self.latitude, self.longitude, zoom) if has_coordinates else ""
+            setattr(self, cell_field(zoom), key)
+
+    def update_needs_geocoding(self):
+        """
+        New rents without coordinates and address changes that don't come
+        with coordinates are queued for geocoding. _loaded_location is set
+        on load by the rent signals.
+        """
+        loaded = getattr(self, "_loaded_location", None)
+        if self._state.adding or loaded is None:
+            self.needs_geocoding = self.latitude is None or self.longitude is None
+            return
+
+        address, city, latitude, longitude = loaded
+        if (self.latitude, self.longitude) != (latitude, longitude):
+            self.needs_geocoding = False
+        # a deferred address wasn't edited
+        elif "address" in self.__dict__ and "city" in self.__dict__ and (self.address, self.city) != (address, city):
+            self.needs_geocoding = True
+
+    def save(self, *args, **kwargs):
+        self.update_geo_cells()
+        self.update_needs_geocoding()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or self.SIGNED_FIELDS & set(update_fields):
+            # find_duplicate_rents --queued skips rents whose text didn't change
+            self.needs_signature = True
+        if update_fields is None or self.MATCHED_FIELDS & set(update_fields):
+            self.needs_matching = True
+        if update_fields is not None:
+            if {"latitude", "longitude"} & set(update_fields):
+                update_fields = {*update_fields, *GEO_CELL_FIELDS}
+            if {"latitude", "longitude", "address", "city"} & set(update_fields):
+                update_fields = {*update_fields, "needs_geocoding"}
+            if self.SIGNED_FIELDS & set(update_fields):
+                update_fields = {*update_fields, "needs_signature"}
+            if self.MATCHED_FIELDS & set(update_fields):
+                update_fields = {*update_fields, "needs_matching"}
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"#{self.id} — {self.title} — {self.owner}"
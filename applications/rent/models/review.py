@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.conf import settings
 from applications.rent.models import Rent
 from rest_framework.exceptions import ValidationError
@@ -16,24 +17,44 @@ class Review(models.Model):
         verbose_name = "Review"
         verbose_name_plural = "Reviews"
 
-    def clean(self):
-        if Review.objects.filter(rent=self.rent, author=self.author).exclude(pk=self.pk).exists():
-            raise ValidationError("⛔ Вы уже оставляли отзыв к этому объявлению.")
+    @staticmethod
+    def get_eligibility(author, rent, exclude_pk=None):
+        """
+        Returns has_booking, has_confirmed_stay and already_reviewed
+        for the author and rent in a single query.
+        """
+        from applications.rent.models import Booking
+
+        bookings = Booking.objects.filter(rent=OuterRef("pk"), tenant=author)
+        reviews = Review.objects.filter(rent=OuterRef("pk"), author=author)
+        if exclude_pk:
+            reviews = reviews.exclude(pk=exclude_pk)
+
+        eligibility = Rent.objects.filter(pk=rent.pk).annotate(
+            has_booking=Exists(bookings),
+            has_confirmed_stay=Exists(bookings.filter(status=Booking.Status.CONFIRMED)),
+            already_reviewed=Exists(reviews),
+        ).values("has_booking", "has_confirmed_stay", "already_reviewed").first()
 
+        return eligibility or {
+            "has_booking": False,
+            "has_confirmed_stay": False,
+            "already_reviewed": False,
+        }
+
+    def clean(self):
         if not 1 <= self.rating <= 5:
             raise ValidationError("⛔ Рейтинг должен быть от 1 до 5.")
 
-        from applications.rent.models import Booking
+        eligibility = Review.get_eligibility(self.author, self.rent, exclude_pk=self.pk)
 
-        bookings = Booking.objects.filter(
-            rent=self.rent,
-            tenant=self.author
-        )
+        if eligibility["already_reviewed"]:
+            raise ValidationError("⛔ Вы уже оставляли отзыв к этому объявлению.")
 
-        if not bookings.exists():
+        if not eligibility["has_booking"]:
             raise ValidationError("⛔ Вы не можете оставить отзыв, так как не бронировали это жильё.")
 
-        if not bookings.filter(status=Booking.Status.CONFIRMED).exists():
+        if not eligibility["has_confirmed_stay"]:
             raise ValidationError("⛔ Вы не можете оставить отзыв, ваша бронь ещё не подтверждена!")
 
     def __str__(self):
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import models
+
+from applications.rent.choices.room_type import RoomType
+
+
+class SavedSearch(models.Model):
+    """
+    RentFilter criteria a tenant wants to be notified about. Empty fields
+    match anything. New and updated rents are matched against it through
+    SavedSearchTerm (see rent.saved_searches).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="saved_searches")
+    name = models.CharField(max_length=100, blank=True)
+    city = models.CharField(max_length=50, blank=True)
+    room_type = models.CharField(max_length=45, blank=True, choices=RoomType.choices())
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    min_rooms = models.PositiveSmallIntegerField(null=True, blank=True)
+    max_rooms = models.PositiveSmallIntegerField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Saved search"
+        verbose_name_plural = "Saved searches"
+
+    def __str__(self):
+        return self.name or f"#{self.pk} {self.city or '*'}"
+
+
+class SavedSearchTerm(models.Model):
+    """
+    Inverted index of saved searches: one row per city, room type,
+    price bucket and rooms count a search accepts, or a wildcard.
+    """
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name="terms")
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["term", "search"]),
+        ]
+
+
+class SavedSearchMatch(models.Model):
+    """
+    Notification queue: a rent that matched a saved search, unread until
+    the tenant acknowledges it.
+    """
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name="matches")
+    rent = models.ForeignKey("rent.Rent", on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        unique_together = ("search", "rent")
@@ -43,4 +43,4 @@ class IsBookingParticipant(permissions.BasePermission):
         return request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        return request.user == obj.tenant or request.user == obj.rent.owner
\ No newline at end of file
+        return request.user.pk in (obj.tenant_id, obj.rent_owner_id)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import math
+from datetime import timedelta
+
+from django.db.models import Avg, Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from applications.rent.models import Rent, Booking
+
+# Bayesian average: ratings are pulled towards PRIOR_RATING until
+# a listing has about PRIOR_WEIGHT reviews of its own.
+PRIOR_RATING = 3.5
+PRIOR_WEIGHT = 5
+
+REVIEWS_SATURATION = 50
+DEMAND_SATURATION = 20
+DEMAND_WINDOW = timedelta(days=90)
+RECENCY_HALF_LIFE_DAYS = 30
+
+WEIGHTS = {
+    "rating": 0.5,
+    "reviews": 0.2,
+    "demand": 0.2,
+    "recency": 0.1,
+}
+
+BATCH_SIZE = 500
+
+
+def annotate_rank_inputs(queryset):
+    """
+    Adds review_avg, review_count and demand (recent active bookings)
+    to a Rent queryset without multiplying review and booking rows.
+    """
+    demand = Booking.objects.filter(
+        rent=OuterRef("pk"),
+        status__in=[Booking.Status.PENDING, Booking.Status.CONFIRMED],
+        created_at__gte=timezone.now() - DEMAND_WINDOW,
+    ).order_by().values("rent").annotate(total=Count("id")).values("total")
+
+    return queryset.annotate(
+        review_avg=Avg("reviews__rating"),
+        review_count=Count("reviews"),
+        demand=Coalesce(Subquery(demand, output_field=IntegerField()), 0),
+    )
+
+
+def compute_rank_score(created_at, review_avg, review_count, demand, now=None):
+    now = now or timezone.now()
+
+    rating = (PRIOR_RATING * PRIOR_WEIGHT + (review_avg or 0) * review_count) / (PRIOR_WEIGHT + review_count)
+    reviews = min(math.log1p(review_count) / math.log1p(REVIEWS_SATURATION), 1)
+    demand = min(math.log1p(demand) / math.log1p(DEMAND_SATURATION), 1)
+    age_days = max((now - created_at).total_seconds() / 86400, 0)
+    recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+    score = (
+        WEIGHTS["rating"] * rating / 5
+        + WEIGHTS["reviews"] * reviews
+        + WEIGHTS["demand"] * demand
+        + WEIGHTS["recency"] * recency
+    )
+    return round(score, 6)
+
+
+def update_rank_scores(rent_ids=None):
+    """
+    Recomputes rank_score for the given rents, or for all rents if
+    rent_ids is None. Returns the number of updated rents.
+    """
+    queryset = Rent.objects.all()
+    if rent_ids is not None:
+        queryset = queryset.filter(id__in=rent_ids)
+
+    rows = annotate_rank_inputs(queryset.order_by()).values_list(
+        "id", "created_at", "review_avg", "review_count", "demand"
+    )
+
+    now = timezone.now()
+    updated = 0
+    batch = []
+    for rent_id, created_at, review_avg, review_count, demand in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(Rent(id=rent_id, rank_score=compute_rank_score(created_at, review_avg, review_count, demand, now)))
+        if len(batch) >= BATCH_SIZE:
+            updated += Rent.objects.bulk_update(batch, ["rank_score"])
+            batch = []
+
+    if batch:
+        updated += Rent.objects.bulk_update(batch, ["rank_score"])
+    return updated
@@ -0,0 +1,64 @@
+import threading
+
+from django.db import transaction
+from django.utils import timezone
+
+from applications.rent.availability import compute_availability, get_busy_dates
+from applications.rent.models import Rent
+from applications.rent.ranking import annotate_rank_inputs, compute_rank_score
+
+BATCH_SIZE = 500
+
+_pending = threading.local()
+
+
+def schedule_refresh(rent_ids):
+    """
+    Refreshes the rents after the current transaction commits. Rents
+    queued several times in a transaction are refreshed once, by the
+    first callback that runs; the others find nothing left to do.
+    """
+    pending = getattr(_pending, "rent_ids", None)
+    if pending is None:
+        pending = _pending.rent_ids = set()
+    pending.update(rent_ids)
+    transaction.on_commit(flush_refresh, robust=True)
+
+
+def flush_refresh():
+    rent_ids, _pending.rent_ids = getattr(_pending, "rent_ids", None), set()
+    if rent_ids:
+        refresh_rents(rent_ids)
+
+
+def refresh_rents(rent_ids):
+    """
+    Recomputes rank_score and next_available_from / free_window_days of
+    the rents: one query for the rank inputs and current availability,
+    one each for bookings and holds, and one bulk update for both.
+    Returns the number of rents.
+    """
+    today = timezone.localdate()
+    now = timezone.now()
+    rows = list(annotate_rank_inputs(Rent.objects.filter(id__in=rent_ids).order_by()).values_list(
+        "id", "created_at", "review_avg", "review_count", "demand",
+        "next_available_from", "free_window_days", "availability_updated_at",
+    ))
+    busy = get_busy_dates([row[0] for row in rows], today)
+
+    rents = []
+    for rent_id, created_at, review_avg, review_count, demand, current_from, current_days, checked_at in rows:
+        available_from, free_days = compute_availability(busy[rent_id], today)
+        rents.append(Rent(
+            id=rent_id,
+            rank_score=compute_rank_score(created_at, review_avg, review_count, demand, now),
+            next_available_from=available_from,
+            free_window_days=free_days,
+            # cache versions follow availability_updated_at, so only a change moves it
+            availability_updated_at=checked_at if (available_from, free_days) == (current_from, current_days) else now,
+        ))
+    return Rent.objects.bulk_update(
+        rents,
+        ["rank_score", "next_available_from", "free_window_days", "availability_updated_at"],
+        batch_size=BATCH_SIZE,
+    )
@@ -0,0 +1,119 @@
+from decimal import Decimal
+
+from django.db.models import Count
+
+from applications.rent.autocomplete import normalize
+from applications.rent.models import Rent, SavedSearch, SavedSearchTerm, SavedSearchMatch
+
+BATCH_SIZE = 500
+PRICE_BUCKET_SIZE = 100
+# wider ranges are indexed as a wildcard and checked exactly afterwards
+MAX_BUCKET_TERMS = 50
+ANY = "*"
+
+
+def range_terms(dimension, low, high, bucket_size):
+    low = low or 0
+    if high is None or (high - low) // bucket_size >= MAX_BUCKET_TERMS:
+        return [f"{dimension}:{ANY}"]
+    return [f"{dimension}:{bucket}" for bucket in range(int(low // bucket_size), int(high // bucket_size) + 1)]
+
+
+def get_search_terms(search):
+    """
+    One term per dimension value the search accepts. The terms of one
+    dimension don't overlap, so a rent hits at most one per dimension.
+    """
+    return [
+        f"city:{normalize(search.city) or ANY}",
+        f"room_type:{search.room_type or ANY}",
+        *range_terms("price", search.min_price, search.max_price, PRICE_BUCKET_SIZE),
+        *range_terms("rooms", search.min_rooms, search.max_rooms, 1),
+    ]
+
+
+def get_rent_terms(rent):
+    price = Decimal(rent.price)
+    return [
+        f"city:{normalize(rent.city)}", f"city:{ANY}",
+        f"room_type:{rent.room_type}", f"room_type:{ANY}",
+        f"price:{int(price // PRICE_BUCKET_SIZE)}", f"price:{ANY}",
+        f"rooms:{rent.rooms_count}", f"rooms:{ANY}",
+    ]
+
+
+def search_matches(search, rent):
+    price = Decimal(rent.price)
+    return (
+        (not search.city or normalize(search.city) == normalize(rent.city))
+        and (not search.room_type or search.room_type == rent.room_type)
+        and (search.min_price is None or price >= search.min_price)
+        and (search.max_price is None or price <= search.max_price)
+        and (search.min_rooms is None or rent.rooms_count >= search.min_rooms)
+        and (search.max_rooms is None or rent.rooms_count <= search.max_rooms)
+    )
+
+
+def update_search_terms(search):
+    SavedSearchTerm.objects.filter(search=search).delete()
+    SavedSearchTerm.objects.bulk_create(
+        SavedSearchTerm(search=search, term=term) for term in get_search_terms(search)
+    )
+
+
+def get_term_counts(terms=None):
+    """
+    Number of saved searches per term (only the given terms if not None).
+    """
+    queryset = SavedSearchTerm.objects.order_by()
+    if terms is not None:
+        queryset = queryset.filter(term__in=terms)
+    return dict(queryset.values_list("term").annotate(searches=Count("id")))
+
+
+def match_rent(rent, term_counts=None):
+    """
+    Queues a SavedSearchMatch for every active saved search the rent
+    satisfies. Candidates are the searches accepting the rent in its most
+    selective dimension by term_counts (see get_term_counts, computed
+    if None), checked exactly afterwards, so the cost follows that
+    dimension's searches, not the number of saved searches. A rent is
+    queued once per search. Returns the number of matched searches.
+    """
+    if not rent.is_active:
+        return 0
+
+    terms = get_rent_terms(rent)
+    if term_counts is None:
+        term_counts = get_term_counts(terms)
+    # (value, wildcard) term pairs, one per dimension
+    dimension = min(
+        zip(terms[::2], terms[1::2]),
+        key=lambda pair: term_counts.get(pair[0], 0) + term_counts.get(pair[1], 0),
+    )
+    candidates = SavedSearchTerm.objects.filter(term__in=dimension).values("search")
+
+    searches = SavedSearch.objects.filter(id__in=candidates, is_active=True).exclude(user_id=rent.owner_id)
+    matched = [search for search in searches if search_matches(search, rent)]
+    SavedSearchMatch.objects.bulk_create(
+        [SavedSearchMatch(search=search, rent=rent) for search in matched], ignore_conflicts=True
+    )
+    return len(matched)
+
+
+def match_queued_rents():
+    """
+    Matches the rents queued with needs_matching against the saved
+    searches. A rent edited meanwhile stays queued. Returns the number
+    of rents and of matches.
+    """
+    rent_ids = list(Rent.objects.filter(needs_matching=True).order_by("id").values_list("id", flat=True))
+    term_counts = get_term_counts()
+    matches = 0
+    for start in range(0, len(rent_ids), BATCH_SIZE):
+        for rent in Rent.objects.filter(id__in=rent_ids[start:start + BATCH_SIZE]).order_by("id").only(
+            "owner", "city", "room_type", "price", "rooms_count", "is_active", "updated_at"
+        ):
+            matches += match_rent(rent, term_counts)
+            Rent.objects.filter(id=rent.pk, updated_at=rent.updated_at).update(needs_matching=False)
+    return len(rent_ids), matches
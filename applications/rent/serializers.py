@@ -1,16 +1,151 @@
+from bisect import bisect_left
+from collections import defaultdict
 from datetime import date
 
+from django.db import IntegrityError, transaction
+from django.db import models
 from django.db.models import Avg
+from django.urls import reverse
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.exceptions import ValidationError
 
-from applications.rent.models import Rent, Booking
+from Finale_Project.metrics import metrics
+from Finale_Project.middleware import ServerTimingMixin
+
+from applications.rent.models import (
+    Rent, Booking, CalendarHold, RentCalendar, SavedSearch, SavedSearchMatch, AuditEntry,
+)
+from applications.rent.models.calendar import new_calendar_token
 from applications.rent.models.review import Review
 from applications.rent.choices.room_type import RoomType
+from applications.rent.audit import record_created
+from applications.rent.availability import update_availability
+from applications.rent.events import publish_booking_event
+from applications.rent.ical import bump_calendar_versions, check_import_url
+from applications.rent.refresh import schedule_refresh
+from applications.user.serializers import UserPublicSerializer
+
+
+class FastDateTimeField(serializers.DateTimeField):
+    """
+    DateTimeField that looks up the current timezone once per field
+    instead of once per value (the lookup dominated list serialization).
+    """
+
+    def default_timezone(self):
+        if not hasattr(self, "_default_timezone"):
+            self._default_timezone = super().default_timezone()
+        return self._default_timezone
+
+
+FIELD_MAPPING = {
+    **serializers.ModelSerializer.serializer_field_mapping,
+    models.DateTimeField: FastDateTimeField,
+}
+
+
+def get_sparse_field_names(request, available):
+    """
+    Field names kept by ?fields=a,b / ?omit=c on GET requests,
+    None if the representation isn't narrowed.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+
+    fields = request.query_params.get("fields")
+    omit = request.query_params.get("omit")
+    if not fields and not omit:
+        return None
+
+    names = set(available)
+    if fields:
+        names &= {name.strip() for name in fields.split(",")}
+    if omit:
+        names -= {name.strip() for name in omit.split(",")}
+    return names
+
+
+def get_expand_names(request):
+    """
+    ?expand=rent,tenant,rent.owner on GET requests as
+    {"rent": {"owner"}, "tenant": set()}.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return {}
+
+    expand = {}
+    for path in request.query_params.get("expand", "").split(","):
+        name, _, nested = path.strip().partition(".")
+        if name:
+            expand.setdefault(name, set())
+            if nested:
+                expand[name].add(nested)
+    return expand
+
+
+class ExpandableFieldsMixin:
+    """
+    Replaces foreign key ids with nested objects for ?expand=, or adds
+    the field if the representation doesn't have it. get_expandable_fields()
+    maps a name to (serializer class, kwargs); the view loads the relations
+    beforehand (see ExpandViewMixin). Unknown names are ignored.
+    """
+
+    def __init__(self, *args, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if expand is None:
+            expand = get_expand_names(self.context.get("request"))
+
+        expandable = self.get_expandable_fields()
+        for name, nested in expand.items():
+            if name in expandable:
+                serializer_class, field_kwargs = expandable[name]
+                expand_nested = {}
+                for path in nested:
+                    head, _, tail = path.partition(".")
+                    expand_nested.setdefault(head, set())
+                    if tail:
+                        expand_nested[head].add(tail)
+                if issubclass(serializer_class, ExpandableFieldsMixin):
+                    field_kwargs = {**field_kwargs, "expand": expand_nested}
+                self.fields[name] = serializer_class(read_only=True, **field_kwargs)
+
+    def get_expandable_fields(self):
+        return {}
+
+
+class SparseFieldsMixin:
+    """
+    Drops the fields not requested with ?fields= / ?omit=, so their
+    SerializerMethodFields are never computed. Writes keep all fields.
+
+    sparse_field_dependencies maps computed fields to the model fields
+    they read, for narrowing the queryset with .only(); sparse_required_fields
+    are loaded whatever the client asked for.
+    """
+    sparse_field_dependencies = {}
+    sparse_required_fields = ("id",)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names = get_sparse_field_names(self.context.get("request"), self.fields)
+        if names is not None:
+            for name in list(self.fields):
+                if name not in names:
+                    self.fields.pop(name)
 
+    @classmethod
+    def get_only_fields(cls, names):
+        concrete = {field.name for field in cls.Meta.model._meta.concrete_fields}
+        only = set(cls.sparse_required_fields)
+        for name in names:
+            only.update(cls.sparse_field_dependencies.get(name, [name]))
+        return sorted(only & concrete)
 
-class RentSerializer(serializers.ModelSerializer):
+
+class RentSerializer(ServerTimingMixin, ExpandableFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    serializer_field_mapping = FIELD_MAPPING
     room_type_display = serializers.SerializerMethodField(read_only=True)
     price_display = serializers.SerializerMethodField(read_only=True)
     average_rating = serializers.SerializerMethodField(read_only=True)
@@ -35,8 +170,27 @@ class RentSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "average_rating",
+            "rank_score",
+            "next_available_from",
+            "free_window_days",
+        ]
+        read_only_fields = [
+            "id", "owner", "created_at", "updated_at", "rank_score", "next_available_from", "free_window_days"
         ]
-        read_only_fields = ["id", "owner", "created_at", "updated_at"]
+
+    sparse_field_dependencies = {
+        "room_type_display": ["room_type"],
+        "price_display": ["price"],
+        "average_rating": [],
+    }
+    # the view builds the ETag of a rent from these
+    sparse_required_fields = ("id", "updated_at", "rank_score", "availability_updated_at")
+
+    def get_expandable_fields(self):
+        return {
+            "owner": (UserPublicSerializer, {}),
+            "reviews": (ReviewSerializer, {"many": True}),
+        }
 
     def get_room_type_display(self, obj):
         return RoomType[obj.room_type].value if obj.room_type else None
@@ -45,7 +199,10 @@ class RentSerializer(serializers.ModelSerializer):
         return f"{obj.price} € / month"
 
     def get_average_rating(self, obj):
-        avg = obj.reviews.aggregate(Avg("rating"))["rating__avg"]
+        if hasattr(obj, "avg_rating"):
+            avg = obj.avg_rating
+        else:
+            avg = obj.reviews.aggregate(Avg("rating"))["rating__avg"]
         return round(avg, 1) if avg is not None else None
 
     def create(self, validated_data):
@@ -53,7 +210,20 @@ class RentSerializer(serializers.ModelSerializer):
         validated_data["owner"] = user
         return super().create(validated_data)
 
-class BookingSerializer(serializers.ModelSerializer):
+
+class RentListSerializer(RentSerializer):
+    """
+    Compact representation for the rent list.
+    """
+
+    class Meta(RentSerializer.Meta):
+        fields = ["id", "title", "city", "price", "rooms_count", "average_rating", "next_available_from"]
+
+    # the list ETag is an aggregate over the queryset, not per row
+    sparse_required_fields = ("id",)
+
+class BookingSerializer(ServerTimingMixin, ExpandableFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    serializer_field_mapping = FIELD_MAPPING
     status = serializers.CharField(read_only=True)
 
     class Meta:
@@ -63,6 +233,15 @@ class BookingSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "tenant", "status", "created_at"]
 
+    # read by IsBookingParticipant
+    sparse_required_fields = ("id", "tenant", "rent_owner")
+
+    def get_expandable_fields(self):
+        return {
+            "rent": (RentListSerializer, {}),
+            "tenant": (UserPublicSerializer, {}),
+        }
+
     def validate(self, attrs):
         rent = attrs.get("rent")
         check_in = attrs.get("check_in")
@@ -81,12 +260,178 @@ class BookingSerializer(serializers.ModelSerializer):
             check_out__gt=check_in
         ).exists()
 
-        if overlapping:
+        if overlapping or CalendarHold.overlapping(rent, check_in, check_out).exists():
             raise serializers.ValidationError("These dates are already busy.")
 
         return attrs
 
-class ReviewSerializer(serializers.ModelSerializer):
+class BookingBatchItemSerializer(serializers.Serializer):
+    rent = serializers.IntegerField()
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+
+
+class BookingBatchSerializer(serializers.Serializer):
+    """
+    Books several stays at once. Conflicts with existing bookings and
+    inside the batch are found with one query and an in-memory sweep.
+    """
+    ALL_OR_NOTHING = "all_or_nothing"
+    PARTIAL = "partial"
+    MAX_ITEMS = 100
+
+    items = BookingBatchItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+    mode = serializers.ChoiceField(choices=[ALL_OR_NOTHING, PARTIAL], default=ALL_OR_NOTHING)
+
+    def _publish_created(self, bookings, owners):
+        for booking in bookings:
+            publish_booking_event(
+                booking.pk, booking.rent_id, booking.tenant_id, owners[booking.rent_id], booking.status, None
+            )
+
+    def _load_pks(self, bookings, tenant):
+        """
+        Sets the pks bulk_create couldn't return (MySQL has no RETURNING).
+        Accepted stays of a rent don't overlap and the tenant's older
+        bookings of the same dates aren't active, so (rent, check_in,
+        check_out) picks the new row.
+        """
+        missing = {(b.rent_id, b.check_in, b.check_out): b for b in bookings if b.pk is None}
+        if not missing:
+            return
+        rows = Booking.objects.filter(
+            tenant=tenant,
+            status=Booking.Status.PENDING,
+            rent_id__in={rent_id for rent_id, _, _ in missing},
+            check_in__in={check_in for _, check_in, _ in missing},
+        ).order_by("id").values_list("id", "rent_id", "check_in", "check_out")
+        for booking_id, *key in rows:
+            booking = missing.get(tuple(key))
+            if booking is not None:
+                booking.pk = booking_id
+                booking._state.adding = False
+
+    def create(self, validated_data):
+        tenant = validated_data["tenant"]
+        items = validated_data["items"]
+        results = [
+            {
+                "index": index,
+                "rent": item["rent"],
+                "check_in": item["check_in"],
+                "check_out": item["check_out"],
+                "status": "created",
+                "booking_id": None,
+                "error": None,
+            }
+            for index, item in enumerate(items)
+        ]
+
+        today = date.today()
+        for result in results:
+            if result["check_in"] < today:
+                result["error"] = "⛔ Нельзя забронировать жильё на прошедшую дату."
+            elif result["check_in"] >= result["check_out"]:
+                result["error"] = "Check-out date must be later than check-in date."
+
+        candidates = [result for result in results if result["error"] is None]
+        owners = dict(
+            Rent.objects.filter(id__in={result["rent"] for result in candidates}).values_list("id", "owner_id")
+        )
+        for result in candidates:
+            if result["rent"] not in owners:
+                result["error"] = "Rent not found."
+
+        candidates = [result for result in candidates if result["error"] is None]
+        self._sweep(candidates)
+
+        accepted = [result for result in results if result["error"] is None]
+        rejected = len(results) - len(accepted)
+
+        for result in results:
+            if result["error"] is not None:
+                result["status"] = "rejected"
+            elif rejected and validated_data["mode"] == self.ALL_OR_NOTHING:
+                result["status"] = "skipped"
+
+        if rejected and validated_data["mode"] == self.ALL_OR_NOTHING:
+            accepted = []
+
+        bookings = [
+            Booking(
+                rent_id=result["rent"],
+                rent_owner_id=owners[result["rent"]],
+                tenant=tenant,
+                check_in=result["check_in"],
+                check_out=result["check_out"],
+            )
+            for result in accepted
+        ]
+        with transaction.atomic():
+            Booking.objects.bulk_create(bookings)
+            self._load_pks(bookings, tenant)
+            # bulk_create doesn't send post_save
+            record_created(bookings)
+            rent_ids = {booking.rent_id for booking in bookings}
+            schedule_refresh(rent_ids)
+            transaction.on_commit(lambda: bump_calendar_versions(rent_ids), robust=True)
+            transaction.on_commit(lambda: self._publish_created(bookings, owners), robust=True)
+
+        if bookings:
+            metrics.inc("booking_transitions_total", {"from": "NEW", "to": Booking.Status.PENDING}, len(bookings))
+
+        for result, booking in zip(accepted, bookings):
+            result["booking_id"] = booking.pk
+
+        return {
+            "mode": validated_data["mode"],
+            "created": len(bookings),
+            "rejected": rejected,
+            "results": results,
+        }
+
+    def _sweep(self, candidates):
+        if not candidates:
+            return
+
+        rent_ids = {result["rent"] for result in candidates}
+        first_day = min(result["check_in"] for result in candidates)
+        last_day = max(result["check_out"] for result in candidates)
+        existing = list(Booking.objects.filter(
+            rent_id__in=rent_ids,
+            status__in=[Booking.Status.PENDING, Booking.Status.CONFIRMED],
+            check_in__lt=last_day,
+            check_out__gt=first_day,
+        ).values_list("rent_id", "check_in", "check_out"))
+        # holds from external calendars block dates like bookings
+        existing += CalendarHold.objects.filter(
+            rent_id__in=rent_ids, start__lt=last_day, end__gt=first_day
+        ).values_list("rent_id", "start", "end")
+        existing.sort()
+
+        # per rent: sorted check-in dates and running max of check-out dates
+        starts = defaultdict(list)
+        max_ends = defaultdict(list)
+        for rent_id, check_in, check_out in existing:
+            ends = max_ends[rent_id]
+            starts[rent_id].append(check_in)
+            ends.append(max(ends[-1], check_out) if ends else check_out)
+
+        busy_until = {}
+        for result in sorted(candidates, key=lambda r: (r["rent"], r["check_in"], r["index"])):
+            rent_id = result["rent"]
+            position = bisect_left(starts[rent_id], result["check_out"])
+
+            if position and max_ends[rent_id][position - 1] > result["check_in"]:
+                result["error"] = "These dates are already busy."
+            elif rent_id in busy_until and result["check_in"] < busy_until[rent_id]:
+                result["error"] = "Dates overlap with another item in this batch."
+            else:
+                busy_until[rent_id] = max(busy_until.get(rent_id, result["check_out"]), result["check_out"])
+
+
+class ReviewSerializer(ServerTimingMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    serializer_field_mapping = FIELD_MAPPING
     author_name = serializers.CharField(source="author.__str__", read_only=True)
 
     class Meta:
@@ -94,6 +439,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ["id", "rent", "author_name", "rating", "comment", "created_at"]
         read_only_fields = ["author_name", "created_at"]
 
+    sparse_field_dependencies = {
+        "author_name": ["author"],
+    }
+    # the view select_relates the author, which can't be deferred
+    sparse_required_fields = ("id", "author")
+
     def validate(self, data):
         user = self.context["request"].user
         rent = data.get("rent")
@@ -115,4 +466,81 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data["author"] = self.context["request"].user
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # unique_together is the final guard against concurrent duplicates
+            raise ValidationError({"non_field_errors": ["⛔ Вы уже оставляли отзыв к этому объявлению."]})
+
+
+class SavedSearchSerializer(ServerTimingMixin, serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = [
+            "id", "name", "city", "room_type", "min_price", "max_price",
+            "min_rooms", "max_rooms", "is_active", "created_at",
+        ]
+        read_only_fields = ["id", "created_at"]
+
+    def validate(self, attrs):
+        for low, high in (("min_price", "max_price"), ("min_rooms", "max_rooms")):
+            value_low = attrs.get(low, getattr(self.instance, low, None))
+            value_high = attrs.get(high, getattr(self.instance, high, None))
+            if value_low is not None and value_high is not None and value_low > value_high:
+                raise serializers.ValidationError({high: f"Must be greater than or equal to {low}."})
+        return attrs
+
+
+class SavedSearchMatchSerializer(ServerTimingMixin, serializers.ModelSerializer):
+    rent = RentListSerializer(read_only=True)
+
+    class Meta:
+        model = SavedSearchMatch
+        fields = ["id", "search", "rent", "created_at", "read_at"]
+        read_only_fields = fields
+
+
+class RentCalendarSerializer(ServerTimingMixin, serializers.ModelSerializer):
+    feed_url = serializers.SerializerMethodField()
+    rotate_token = serializers.BooleanField(write_only=True, required=False, default=False)
+
+    class Meta:
+        model = RentCalendar
+        fields = ["feed_url", "import_url", "imported_at", "rotate_token"]
+        read_only_fields = ["imported_at"]
+
+    def validate_import_url(self, value):
+        # fetched by the server: public http(s) hosts only
+        if value:
+            try:
+                check_import_url(value)
+            except ValueError as exc:
+                raise serializers.ValidationError(str(exc))
+        return value
+
+    def get_feed_url(self, obj):
+        url = reverse("rent-calendar-feed", args=[obj.token])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def update(self, instance, validated_data):
+        # the old feed URL stops working, e.g. after it leaked
+        if validated_data.pop("rotate_token", False):
+            instance.token = new_calendar_token()
+
+        import_url = validated_data.get("import_url", instance.import_url)
+        if import_url != instance.import_url:
+            instance.import_etag = ""
+            instance.imported_at = None
+            if not import_url:
+                CalendarHold.objects.filter(rent_id=instance.rent_id).delete()
+                rent_id = instance.rent_id
+                transaction.on_commit(lambda: update_availability([rent_id]), robust=True)
+        return super().update(instance, validated_data)
+
+
+class AuditEntrySerializer(ServerTimingMixin, serializers.ModelSerializer):
+    class Meta:
+        model = AuditEntry
+        fields = ["id", "object_type", "object_id", "action", "changes", "actor", "source", "created_at"]
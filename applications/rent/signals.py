@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from Finale_Project.metrics import metrics
+from applications.rent.autocomplete import rent_autocomplete
+from applications.rent.audit import load_snapshot, record_deleted, record_saved
+from applications.rent.events import publish_booking_event
+from applications.rent.ical import bump_calendar_versions
+from applications.rent.models import Rent, Booking, Review, SavedSearch, RentCalendar
+from applications.rent.refresh import schedule_refresh
+from applications.rent.saved_searches import update_search_terms
+
+
+def get_loaded_location(rent):
+    return tuple(rent.__dict__.get(name) for name in ("address", "city", "latitude", "longitude"))
+
+
+@receiver(post_save, sender=Rent)
+def rent_saved(sender, instance, created, **kwargs):
+    if created:
+        RentCalendar.objects.create(rent=instance)
+        schedule_refresh([instance.pk])
+    transaction.on_commit(lambda: rent_autocomplete.rent_saved(instance), robust=True)
+
+
+@receiver(post_delete, sender=Rent)
+def rent_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: rent_autocomplete.rent_deleted(instance), robust=True)
+
+
+@receiver(post_init, sender=Rent)
+def rent_loaded(sender, instance, **kwargs):
+    # without reading a deferred owner
+    instance._loaded_owner_id = instance.__dict__.get("owner_id")
+    instance._loaded_location = get_loaded_location(instance)
+
+
+@receiver(post_save, sender=Rent)
+def rent_location_changed(sender, instance, **kwargs):
+    # queued rents (needs_geocoding) are geocoded by the geocode_rents command
+    instance._loaded_location = get_loaded_location(instance)
+
+
+@receiver(post_save, sender=Rent)
+def rent_owner_changed(sender, instance, created, **kwargs):
+    if not created and instance._loaded_owner_id != instance.owner_id:
+        Booking.objects.filter(rent=instance).exclude(rent_owner=instance.owner_id).update(
+            rent_owner=instance.owner_id
+        )
+    instance._loaded_owner_id = instance.owner_id
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    schedule_refresh([instance.rent_id])
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    # rank (demand) and the first free window both follow status and dates
+    schedule_refresh([instance.rent_id])
+    rent_id = instance.rent_id
+    transaction.on_commit(lambda: bump_calendar_versions([rent_id]), robust=True)
+
+
+@receiver(post_init, sender=Booking)
+def booking_loaded(sender, instance, **kwargs):
+    # a status deferred by ?fields= isn't loaded just for this
+    instance._loaded_status = instance.__dict__.get("status")
+
+
+@receiver(post_save, sender=Booking)
+def booking_status_changed(sender, instance, created, **kwargs):
+    previous = None if created else instance._loaded_status
+    if created or previous not in (None, instance.status):
+        metrics.inc("booking_transitions_total", {"from": previous or "NEW", "to": instance.status})
+        event = (instance.pk, instance.rent_id, instance.tenant_id, instance.rent_owner_id, instance.status, previous)
+        transaction.on_commit(lambda: publish_booking_event(*event), robust=True)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=SavedSearch)
+def saved_search_saved(sender, instance, **kwargs):
+    update_search_terms(instance)
+
+
+@receiver(pre_save, sender=Rent)
+@receiver(pre_save, sender=Booking)
+def audited_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not instance._state.adding and not raw:
+        load_snapshot(instance, update_fields)
+
+
+@receiver(post_save, sender=Rent)
+@receiver(post_save, sender=Booking)
+def audited_saved(sender, instance, created, update_fields=None, **kwargs):
+    record_saved(instance, created, update_fields)
+
+
+@receiver(post_delete, sender=Rent)
+@receiver(post_delete, sender=Booking)
+def audited_deleted(sender, instance, **kwargs):
+    record_deleted(instance)
@@ -0,0 +1,51 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from Finale_Project.renderers import FastJSONRenderer
+
+STREAM_CHUNK_SIZE = 500
+
+
+def iter_in_chunks(queryset, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields the objects of queryset in its order, loading chunk_size rows
+    at a time by primary key. Unlike .iterator() this keeps memory bounded
+    on MySQL as well, whose driver buffers the whole result set; only
+    the list of primary keys is held for the whole run.
+    """
+    pks = list(queryset.prefetch_related(None).values_list("pk", flat=True))
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        objects = {obj.pk: obj for obj in queryset.filter(pk__in=chunk).order_by()}
+        # rows deleted since the pks were read are skipped
+        yield from (objects[pk] for pk in chunk if pk in objects)
+
+
+def stream_json_array(rows):
+    renderer = FastJSONRenderer()
+    yield b"["
+    for index, row in enumerate(rows):
+        if index:
+            yield b","
+        yield renderer.render(row)
+    yield b"]"
+
+
+def stream_ndjson(rows):
+    renderer = FastJSONRenderer()
+    for row in rows:
+        yield renderer.render(row) + b"\n"
+
+
+async def aiter_in_thread(pieces, batch_size=STREAM_CHUNK_SIZE):
+    """
+    Async iterator over a sync iterator of bytes. Under ASGI Django reads
+    a sync streaming body whole before sending it; this sends it batch_size
+    pieces at a time instead, pulled in the thread sync views run in, where
+    the queryset's database connection lives.
+    """
+    pieces = iter(pieces)
+    take = sync_to_async(lambda: b"".join(islice(pieces, batch_size)), thread_sensitive=True)
+    while chunk := await take():
+        yield chunk
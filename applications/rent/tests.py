@@ -1,3 +1,986 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+import io
+import json
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from Finale_Project.renderers import FastJSONRenderer
+
+from applications.rent import ical, streaming
+from applications.rent.autocomplete import rent_autocomplete
+from applications.rent.audit import collect_audit
+from applications.rent.conflicts import audit_bookings
+from applications.rent.duplicates import sign_queued_rents
+from applications.rent.events import CacheBackend, booking_events, stream_booking_events
+from applications.rent.geocoding import FileProvider, GeocodingError, geocode_rents
+from applications.rent.models import (
+    AuditEntry, Rent, Booking, IdempotencyKey, Review, RentSignature, SavedSearch, SavedSearchMatch,
+)
+from applications.rent.ranking import update_rank_scores
+from applications.rent.saved_searches import match_queued_rents, match_rent, search_matches
+from applications.user.models import User
+
+
+def create_user(email, role="TENANT", **kwargs):
+    return User.objects.create_user(email, "pw12345!", role=role, **kwargs)
+
+
+def create_rent(owner, **kwargs):
+    fields = dict(
+        title="Flat", description="Nice flat", city="Berlin", address="Main st 1",
+        price="100.00", rooms_count=2, room_type="STUDIO",
+    )
+    fields.update(kwargs)
+    return Rent.objects.create(owner=owner, **fields)
+
+
+class ReviewSparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.rent = create_rent(cls.landlord)
+        cls.review = Review.objects.create(rent=cls.rent, author=cls.tenant, rating=4)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_fields_without_author(self):
+        response = self.client.get("/api/rent/reviews/?fields=id,rating")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"id": self.review.id, "rating": 4}])
+
+    def test_omit_author_name(self):
+        response = self.client.get("/api/rent/reviews/?omit=author_name")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("author_name", response.json()[0])
+
+    def test_streamed_fields(self):
+        response = self.client.get("/api/rent/reviews/?stream=1&fields=id,rating")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b'[{"id":%d,"rating":4}]' % self.review.id)
+
+
+class RankScoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenants = [create_user(f"tenant{i}@example.com") for i in range(3)]
+        cls.plain = create_rent(cls.landlord, title="Plain")
+        cls.liked = create_rent(cls.landlord, title="Liked")
+        cls.disliked = create_rent(cls.landlord, title="Disliked")
+
+    def test_reviews_refresh_rank_score(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for tenant in self.tenants:
+                Review.objects.create(rent=self.liked, author=tenant, rating=5)
+                Review.objects.create(rent=self.disliked, author=tenant, rating=1)
+
+        client = APIClient()
+        client.force_authenticate(self.tenants[0])
+        response = client.get("/api/rent/rents/?ordering=recommended")
+        self.assertEqual(
+            [rent["id"] for rent in response.json()],
+            [self.liked.id, self.plain.id, self.disliked.id],
+        )
+
+    def test_recompute_matches_refresh(self):
+        Review.objects.create(rent=self.liked, author=self.tenants[0], rating=5)
+        self.assertEqual(update_rank_scores(), 3)
+        scores = dict(Rent.objects.values_list("id", "rank_score"))
+        self.assertGreater(scores[self.liked.id], scores[self.plain.id])
+
+
+class ClusterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        create_rent(cls.landlord, latitude=52.5200, longitude=13.4050, price="100.00")
+        create_rent(cls.landlord, latitude=52.5210, longitude=13.4060, price="200.00")
+        create_rent(cls.landlord, latitude=48.1351, longitude=11.5820, price="300.00")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+
+    def test_nearby_rents_share_a_cluster(self):
+        response = self.client.get("/api/rent/rents/clusters/?bbox=5,47,15,55&zoom=6")
+        self.assertEqual(response.status_code, 200)
+        clusters = sorted(response.json()["clusters"], key=lambda cluster: cluster["count"])
+        self.assertEqual([cluster["count"] for cluster in clusters], [1, 2])
+        self.assertEqual(clusters[1]["min_price"], 100)
+
+    def test_invalid_bbox(self):
+        response = self.client.get("/api/rent/rents/clusters/?bbox=15,47,5,55&zoom=6")
+        self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.rent = create_rent(cls.landlord)
+        cls.today = timezone.localdate()
+
+    def book(self, start, end, status=Booking.Status.CONFIRMED):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                rent=self.rent, tenant=self.tenant, status=status,
+                check_in=self.today + timedelta(days=start), check_out=self.today + timedelta(days=end),
+            )
+
+    def test_booking_moves_next_available_from(self):
+        self.book(0, 3)
+        self.book(5, 7, Booking.Status.PENDING)
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.next_available_from, self.today + timedelta(days=3))
+        self.assertEqual(self.rent.free_window_days, 2)
+
+    def test_cancelled_booking_frees_dates(self):
+        booking = self.book(0, 3)
+        booking.status = Booking.Status.CANCELLED
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.next_available_from, self.today)
+        self.assertIsNone(self.rent.free_window_days)
+
+    def test_min_free_days_filter(self):
+        self.book(1, 3)
+        client = APIClient()
+        client.force_authenticate(self.tenant)
+        self.assertEqual(client.get("/api/rent/rents/?min_free_days=2").json(), [])
+        self.assertEqual(len(client.get("/api/rent/rents/?available_by=%s" % self.today).json()), 1)
+
+
+class IdempotencyKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.rent = create_rent(cls.landlord)
+        cls.today = timezone.localdate()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.tenant)
+
+    def book(self, key, days=(10, 12)):
+        data = {
+            "rent": self.rent.id,
+            "check_in": str(self.today + timedelta(days=days[0])),
+            "check_out": str(self.today + timedelta(days=days[1])),
+        }
+        return self.client.post("/api/rent/bookings/", data, format="json", headers={"Idempotency-Key": key})
+
+    def test_retry_replays_the_response(self):
+        first = self.book("key-1")
+        self.assertEqual(first.status_code, 201)
+        retry = self.book("key-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_key_reused_for_another_request(self):
+        self.assertEqual(self.book("key-1").status_code, 201)
+        self.assertEqual(self.book("key-1", days=(20, 22)).status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_request_in_progress(self):
+        self.assertEqual(self.book("key-1").status_code, 201)
+        IdempotencyKey.objects.update(status_code=None, response=None)
+        self.assertEqual(self.book("key-1").status_code, 409)
+
+    @override_settings(IDEMPOTENCY_KEY_LEASE=60)
+    def test_abandoned_request_is_taken_over(self):
+        self.assertEqual(self.book("key-1").status_code, 201)
+        Booking.objects.all().delete()
+        # the worker died before storing the response
+        IdempotencyKey.objects.update(
+            status_code=None, response=None, created_at=timezone.now() - timedelta(seconds=61)
+        )
+        retry = self.book("key-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", retry)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class ReviewEligibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.rent = create_rent(cls.landlord)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.tenant)
+
+    def review(self):
+        return self.client.post("/api/rent/reviews/", {"rent": self.rent.id, "rating": 5}, format="json")
+
+    def add_booking(self, status):
+        today = timezone.localdate()
+        Booking.objects.create(
+            rent=self.rent, tenant=self.tenant, status=status,
+            check_in=today - timedelta(days=5), check_out=today - timedelta(days=2),
+        )
+
+    def test_without_booking(self):
+        self.assertEqual(self.review().status_code, 400)
+
+    def test_with_unconfirmed_booking(self):
+        self.add_booking(Booking.Status.PENDING)
+        self.assertEqual(self.review().status_code, 400)
+
+    def test_after_confirmed_stay_once(self):
+        self.add_booking(Booking.Status.CONFIRMED)
+        self.assertEqual(self.review().status_code, 201)
+        self.assertEqual(self.review().status_code, 400)
+        self.assertEqual(Review.objects.count(), 1)
+
+
+class BookingBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.rent = create_rent(cls.landlord)
+        cls.other_rent = create_rent(cls.landlord)
+        cls.today = timezone.localdate()
+        Booking.objects.create(
+            rent=cls.rent, tenant=create_user("other@example.com"), status=Booking.Status.CONFIRMED,
+            check_in=cls.today + timedelta(days=10), check_out=cls.today + timedelta(days=15),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.tenant)
+
+    def item(self, rent, start, end):
+        return {
+            "rent": rent.id,
+            "check_in": str(self.today + timedelta(days=start)),
+            "check_out": str(self.today + timedelta(days=end)),
+        }
+
+    def batch(self, items, mode="all_or_nothing"):
+        return self.client.post("/api/rent/bookings/batch/", {"items": items, "mode": mode}, format="json")
+
+    def test_all_created(self):
+        response = self.batch([self.item(self.rent, 1, 3), self.item(self.rent, 3, 5), self.item(self.other_rent, 1, 3)])
+        self.assertEqual(response.status_code, 201)
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], ["created"] * 3)
+        self.assertEqual(
+            sorted(result["booking_id"] for result in results),
+            sorted(Booking.objects.filter(tenant=self.tenant).values_list("id", flat=True)),
+        )
+
+    def test_conflicts_reject_the_whole_batch(self):
+        response = self.batch([self.item(self.rent, 1, 3), self.item(self.rent, 12, 14)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result["status"] for result in response.json()["results"]], ["skipped", "rejected"])
+        self.assertFalse(Booking.objects.filter(tenant=self.tenant).exists())
+
+    def test_partial_mode(self):
+        response = self.batch(
+            [self.item(self.rent, 1, 4), self.item(self.rent, 3, 5), self.item(self.rent, 14, 16), self.item(self.rent, 20, 22)],
+            mode="partial",
+        )
+        self.assertEqual(response.status_code, 201)
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], ["created", "rejected", "rejected", "created"])
+        self.assertEqual(results[1]["error"], "Dates overlap with another item in this batch.")
+        self.assertEqual(results[2]["error"], "These dates are already busy.")
+        self.assertEqual(Booking.objects.filter(tenant=self.tenant).count(), 2)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        create_rent(cls.landlord, city="Berlin", address="Bergstr 5")
+        create_rent(cls.landlord, city="berlin ")
+        create_rent(cls.landlord, city="Bern")
+        create_rent(cls.landlord, city="Munich", is_active=False)
+
+    def setUp(self):
+        # the index outlives test transactions, a new version stamp rebuilds it
+        cache.clear()
+        rent_autocomplete._checked_at = 0
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+
+    def search(self, prefix):
+        return self.client.get("/api/rent/rents/autocomplete/", {"q": prefix}).json()
+
+    def test_prefix_search(self):
+        result = self.search("BER")
+        self.assertEqual(result["cities"], [{"value": "Berlin", "count": 2}, {"value": "Bern", "count": 1}])
+        self.assertEqual(result["addresses"], [{"value": "Bergstr 5", "count": 1}])
+        self.assertEqual(self.search("mu"), {"cities": [], "addresses": []})
+
+    def test_short_prefix(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(rent_autocomplete.search(" b "), {"cities": [], "addresses": []})
+        self.assertEqual(self.search(""), {"cities": [], "addresses": []})
+
+
+class RentSparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.rent = create_rent(cls.landlord)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+
+    def test_compact_list(self):
+        rent = self.client.get("/api/rent/rents/").json()[0]
+        self.assertEqual(
+            set(rent), {"id", "title", "city", "price", "rooms_count", "average_rating", "next_available_from"}
+        )
+
+    def test_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/rent/rents/{self.rent.id}/?fields=id,title")
+        self.assertEqual(response.json(), {"id": self.rent.id, "title": "Flat"})
+        rent_sql = [query["sql"] for query in queries.captured_queries if 'FROM "rent"' in query["sql"]]
+        self.assertTrue(rent_sql)
+        self.assertNotIn('"description"', rent_sql[0])
+
+    def test_omit(self):
+        rent = self.client.get(f"/api/rent/rents/{self.rent.id}/?omit=description,average_rating").json()
+        self.assertIn("title", rent)
+        self.assertNotIn("description", rent)
+        self.assertNotIn("average_rating", rent)
+
+
+class MessagePackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.rent = create_rent(cls.landlord)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+
+    def test_same_data_as_json(self):
+        url = f"/api/rent/rents/{self.rent.id}/"
+        response = self.client.get(url, headers={"Accept": "application/msgpack"})
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get(url).json())
+
+    def test_msgpack_request_body(self):
+        response = self.client.patch(
+            f"/api/rent/rents/{self.rent.id}/",
+            msgpack.packb({"title": "Packed"}),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.title, "Packed")
+
+    def test_invalid_msgpack(self):
+        response = self.client.patch(
+            f"/api/rent/rents/{self.rent.id}/", b"\xc1", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_fast_json_matches_drf(self):
+        data = {"price": Decimal("10.50"), "at": timezone.now(), "day": timezone.localdate(), "text": "a b"}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class RentConditionalRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.rent = create_rent(cls.landlord)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+        self.url = f"/api/rent/rents/{self.rent.id}/"
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Last-Modified"])
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": etag}).status_code, 304)
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": f"W/{etag}"}).status_code, 304)
+
+    def test_edit_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.patch(self.url, {"title": "Changed"}, format="json")
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_list_not_modified_until_a_rent_changes(self):
+        etag = self.client.get("/api/rent/rents/")["ETag"]
+        self.assertEqual(self.client.get("/api/rent/rents/", headers={"If-None-Match": etag}).status_code, 304)
+        create_rent(self.landlord)
+        self.assertEqual(self.client.get("/api/rent/rents/", headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_if_match(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.patch(self.url, {"title": "First"}, format="json", headers={"If-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        # the second writer still holds the old version
+        response = self.client.patch(self.url, {"title": "Second"}, format="json", headers={"If-Match": etag})
+        self.assertEqual(response.status_code, 412)
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.title, "First")
+
+
+class ExpandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        today = timezone.localdate()
+        for days in (10, 20, 30):
+            Booking.objects.create(
+                rent=create_rent(cls.landlord), tenant=cls.tenant,
+                check_in=today + timedelta(days=days), check_out=today + timedelta(days=days + 2),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.tenant)
+
+    def test_expanded_booking(self):
+        booking = self.client.get("/api/rent/bookings/?expand=rent.owner,tenant").json()[0]
+        self.assertEqual(booking["tenant"]["id"], self.tenant.id)
+        self.assertEqual(booking["rent"]["title"], "Flat")
+        self.assertEqual(booking["rent"]["owner"]["id"], self.landlord.id)
+
+    def test_queries_dont_grow_with_the_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/rent/bookings/?expand=rent.owner,tenant")
+        Booking.objects.create(
+            rent=create_rent(self.landlord), tenant=self.tenant,
+            check_in=timezone.localdate() + timedelta(days=40), check_out=timezone.localdate() + timedelta(days=42),
+        )
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(len(self.client.get("/api/rent/bookings/?expand=rent.owner,tenant").json()), 4)
+
+    def test_no_etag_with_expand(self):
+        rent_id = Booking.objects.first().rent_id
+        client = APIClient()
+        client.force_authenticate(self.landlord)
+        response = client.get(f"/api/rent/rents/{rent_id}/?expand=owner,reviews")
+        self.assertEqual(response.json()["owner"]["id"], self.landlord.id)
+        self.assertEqual(response.json()["reviews"], [])
+        self.assertNotIn("ETag", response)
+
+
+class BulkRetrieveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.rents = [create_rent(cls.landlord, title=f"Flat {i}") for i in range(3)]
+        cls.hidden = create_rent(create_user("other@example.com", "LANDLORD"))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+
+    def test_requested_order_and_not_found(self):
+        ids = [self.rents[2].id, self.rents[0].id, self.hidden.id, 999999]
+        response = self.client.get("/api/rent/rents/bulk/", {"ids": ",".join(map(str, ids))})
+        self.assertEqual([rent["id"] for rent in response.json()["results"]], ids[:2])
+        self.assertEqual(response.json()["not_found"], ids[2:])
+
+    def test_cached_until_the_rent_changes(self):
+        url = f"/api/rent/rents/bulk/?ids={self.rents[0].id}"
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).json()["results"][0]["title"], "Flat 0")
+        self.rents[0].title = "Renamed"
+        self.rents[0].save()
+        self.assertEqual(self.client.get(url).json()["results"][0]["title"], "Renamed")
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get("/api/rent/rents/bulk/?ids=1,x").status_code, 400)
+        self.assertEqual(self.client.get("/api/rent/rents/bulk/?ids=").status_code, 400)
+
+
+class StreamingListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        for i in range(5):
+            create_rent(cls.landlord, title=f"Flat {i}")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+
+    def test_json_array(self):
+        response = self.client.get("/api/rent/rents/?stream=1")
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), self.client.get("/api/rent/rents/").json())
+
+    @mock.patch.object(streaming.iter_in_chunks, "__defaults__", (2,))
+    def test_ndjson_in_chunks(self):
+        response = self.client.get("/api/rent/rents/", headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(rows, self.client.get("/api/rent/rents/").json())
+
+    async def test_async_iterator_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.landlord)
+        response = await client.get("/api/rent/rents/?stream=1")
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(json.loads(content)), 5)
+
+
+class BookingEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.stranger = create_user("stranger@example.com")
+        today = timezone.localdate()
+        cls.booking = Booking.objects.create(
+            rent=create_rent(cls.landlord), tenant=cls.tenant,
+            check_in=today + timedelta(days=10), check_out=today + timedelta(days=12),
+        )
+
+    def confirm(self):
+        client = APIClient()
+        client.force_authenticate(self.landlord)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(f"/api/rent/bookings/{self.booking.id}/confirm/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_status_change_reaches_both_parties(self):
+        last_id = booking_events.last_id()
+        self.confirm()
+        for user in (self.tenant, self.landlord):
+            events, _ = booking_events.read(last_id, user.id)
+            self.assertEqual(
+                [(event["booking"], event["previous"], event["status"]) for event in events],
+                [(self.booking.id, "PENDING", "CONFIRMED")],
+            )
+        self.assertEqual(booking_events.read(last_id, self.stranger.id)[0], [])
+
+    def test_cache_backend(self):
+        cache.clear()
+        backend = CacheBackend()
+        for status in ("PENDING", "CONFIRMED"):
+            backend.publish({"booking": 1, "status": status})
+        self.assertEqual([event["status"] for event in backend.read(1)], ["CONFIRMED"])
+        self.assertEqual(backend.last_id(), 2)
+
+    async def test_stream_continues_after_last_event_id(self):
+        last_id = booking_events.last_id()
+        await sync_to_async(self.confirm)()
+        stream = stream_booking_events(self.tenant.id, last_id)
+        try:
+            self.assertEqual(await anext(stream), "retry: 3000\n\n")
+            event = await anext(stream)
+        finally:
+            await stream.aclose()
+        self.assertIn(f"id: {last_id + 1}\nevent: booking\n", event)
+        self.assertIn('"status": "CONFIRMED"', event)
+
+
+class BookingRentOwnerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.new_landlord = create_user("new@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.rent = create_rent(cls.landlord)
+        today = timezone.localdate()
+        cls.booking = Booking.objects.create(
+            rent=cls.rent, tenant=cls.tenant,
+            check_in=today + timedelta(days=10), check_out=today + timedelta(days=12),
+        )
+
+    def bookings_of(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return [booking["id"] for booking in client.get("/api/rent/bookings/").json()]
+
+    def test_rent_owner_is_copied_on_create(self):
+        self.assertEqual(self.booking.rent_owner_id, self.landlord.id)
+        self.assertEqual(self.bookings_of(self.landlord), [self.booking.id])
+        self.assertEqual(self.bookings_of(self.tenant), [self.booking.id])
+        self.assertEqual(self.bookings_of(self.new_landlord), [])
+
+    def test_owner_change_moves_the_bookings(self):
+        rent = Rent.objects.get(pk=self.rent.pk)
+        rent.owner = self.new_landlord
+        rent.save()
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.rent_owner_id, self.new_landlord.id)
+        self.assertEqual(self.bookings_of(self.new_landlord), [self.booking.id])
+        self.assertEqual(self.bookings_of(self.landlord), [])
+
+
+class SavedSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.tenant)
+
+    def save_search(self, **criteria):
+        response = self.client.post("/api/rent/saved-searches/", criteria, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def test_queued_rents_are_matched(self):
+        berlin = self.save_search(city="berlin", max_price="150.00")
+        cheap = self.save_search(max_price="120.00", min_rooms=2)
+        create_rent(self.landlord, city="Berlin", price="140.00", rooms_count=2)
+        create_rent(self.landlord, city="Munich", price="100.00", rooms_count=3)
+        create_rent(self.landlord, city="Berlin", price="500.00")
+
+        call_command("match_saved_searches", stdout=io.StringIO())
+
+        matches = self.client.get("/api/rent/saved-searches/matches/?unread=1").json()
+        self.assertEqual(
+            sorted((match["search"], match["rent"]["city"]) for match in matches),
+            sorted([(berlin, "Berlin"), (cheap, "Munich")]),
+        )
+        self.assertFalse(Rent.objects.filter(needs_matching=True).exists())
+
+    def test_edit_is_matched_again(self):
+        search = self.save_search(city="Hamburg")
+        rent = create_rent(self.landlord, city="Berlin")
+        match_queued_rents()
+        rent.city = "Hamburg"
+        rent.save(update_fields=["city"])
+        self.assertEqual(match_queued_rents(), (1, 1))
+        self.assertEqual(SavedSearchMatch.objects.get().search_id, search)
+
+    def test_read_matches(self):
+        self.save_search()
+        create_rent(self.landlord)
+        match_queued_rents()
+        self.assertEqual(self.client.post("/api/rent/saved-searches/matches/read/", {}, format="json").json(), {"read": 1})
+        self.assertEqual(self.client.get("/api/rent/saved-searches/matches/?unread=1").json(), [])
+
+    def test_match_rent_agrees_with_a_full_scan(self):
+        criteria = [
+            {}, {"city": "Berlin"}, {"room_type": "STUDIO"}, {"min_price": Decimal("90"), "max_price": Decimal("110")},
+            {"min_rooms": 3}, {"city": "Munich", "max_rooms": 2}, {"max_price": Decimal("99999")},
+        ]
+        searches = [SavedSearch.objects.create(user=self.tenant, **fields) for fields in criteria]
+        for city, price, rooms in [("Berlin", "100.00", 2), ("Munich", "250.00", 3), ("berlin", "95.50", 1)]:
+            rent = create_rent(self.landlord, city=city, price=price, rooms_count=rooms)
+            rent.refresh_from_db()
+            match_rent(rent)
+            self.assertEqual(
+                set(SavedSearchMatch.objects.filter(rent=rent).values_list("search_id", flat=True)),
+                {search.id for search in searches if search_matches(search, rent)},
+            )
+
+
+class RentCalendarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.rent = create_rent(cls.landlord, title="Flat, with view")
+        cls.today = timezone.localdate()
+        cls.booking = Booking.objects.create(
+            rent=cls.rent, tenant=cls.tenant, status=Booking.Status.CONFIRMED,
+            check_in=cls.today + timedelta(days=3), check_out=cls.today + timedelta(days=5),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.landlord)
+        self.url = f"/api/rent/rents/{self.rent.id}/calendar/"
+
+    def test_feed(self):
+        feed_url = self.client.get(self.url).json()["feed_url"]
+        response = APIClient().get(feed_url)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = response.content.decode()
+        self.assertIn("X-WR-CALNAME:Flat\\, with view\r\n", body)
+        self.assertIn(f"UID:booking-{self.booking.id}@rental-platform\r\n", body)
+        self.assertIn(f"DTSTART;VALUE=DATE:{self.booking.check_in:%Y%m%d}\r\n", body)
+
+    def test_rotated_token(self):
+        old_url = self.client.get(self.url).json()["feed_url"]
+        new_url = self.client.patch(self.url, {"rotate_token": True}, format="json").json()["feed_url"]
+        self.assertEqual(APIClient().get(old_url).status_code, 404)
+        self.assertEqual(APIClient().get(new_url).status_code, 200)
+
+    def test_private_import_urls_are_refused(self):
+        for url in ("http://127.0.0.1/cal.ics", "http://169.254.169.254/latest/", "ftp://example.com/cal.ics"):
+            response = self.client.patch(self.url, {"import_url": url}, format="json")
+            self.assertEqual(response.status_code, 400, url)
+
+    def test_imported_events_block_dates(self):
+        start, end = self.today + timedelta(days=10), self.today + timedelta(days=12)
+        text = (
+            "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:ext-1\r\n"
+            f"DTSTART;VALUE=DATE:{start:%Y%m%d}\r\nDTEND;VALUE=DATE:{end:%Y%m%d}\r\n"
+            "SUMMARY:Booked elsewhere\r\nEND:VEVENT\r\n"
+            "BEGIN:VEVENT\r\nUID:ext-2\r\nDTSTART:20200101\r\nSTATUS:CANCELLED\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+        )
+        self.assertEqual(ical.import_holds(self.rent.id, text), 1)
+
+        client = APIClient()
+        client.force_authenticate(self.tenant)
+        item = {"rent": self.rent.id, "check_in": str(start + timedelta(days=1)), "check_out": str(end + timedelta(days=1))}
+        response = client.post("/api/rent/bookings/batch/", {"items": [item]}, format="json")
+        self.assertEqual(response.json()["results"][0]["error"], "These dates are already busy.")
+
+    def test_oversized_calendar(self):
+        class Response(io.BytesIO):
+            headers = {}
+
+        with mock.patch("applications.rent.ical.check_import_url"), \
+                mock.patch.object(ical.opener, "open", return_value=Response(b"x" * (ical.MAX_ICS_BYTES + 1))):
+            with self.assertRaises(ValueError):
+                ical.fetch_calendar("https://calendar.example.com/cal.ics")
+
+
+class GeocodingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "addresses.csv")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write('"Main st 1, Berlin",52.52,13.405\n')
+        self.provider = FileProvider(path)
+
+    def test_queued_rents_get_coordinates(self):
+        rent = create_rent(self.landlord)
+        unknown = create_rent(self.landlord, address="Nowhere 5")
+        self.assertTrue(rent.needs_geocoding)
+
+        self.assertEqual(geocode_rents(provider=self.provider), (2, 0))
+        rent.refresh_from_db()
+        unknown.refresh_from_db()
+        self.assertEqual((rent.latitude, rent.longitude, rent.needs_geocoding), (52.52, 13.405, False))
+        self.assertEqual(rent.cell_z6, "34:20")
+        # not found is stored too, the rent isn't looked up again
+        self.assertEqual((unknown.latitude, unknown.needs_geocoding), (None, False))
+
+    def test_cached_addresses_skip_the_provider(self):
+        create_rent(self.landlord)
+        geocode_rents(provider=self.provider)
+        rent = create_rent(self.landlord, address="main  ST 1")
+        self.assertEqual(geocode_rents(provider=None), (1, 0))
+        rent.refresh_from_db()
+        self.assertEqual(rent.latitude, 52.52)
+
+    def test_address_change_queues_the_rent(self):
+        rent = create_rent(self.landlord, latitude=1.0, longitude=2.0)
+        self.assertFalse(rent.needs_geocoding)
+        rent = Rent.objects.get(pk=rent.pk)
+        rent.address = "Other st 2"
+        rent.save()
+        self.assertTrue(Rent.objects.get(pk=rent.pk).needs_geocoding)
+
+    def test_provider_errors_keep_the_rent_queued(self):
+        rent = create_rent(self.landlord)
+        with mock.patch.object(self.provider, "geocode", side_effect=GeocodingError("quota")):
+            self.assertEqual(geocode_rents(provider=self.provider), (0, 1))
+        self.assertTrue(Rent.objects.get(pk=rent.pk).needs_geocoding)
+
+
+class DuplicateRentTests(TestCase):
+    DESCRIPTION = (
+        "Bright two room flat on the third floor with a balcony facing the park, "
+        "a fully equipped kitchen, fast internet and a washing machine. Five minutes to the metro."
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.original = create_rent(cls.landlord, title="Sunny flat near the park", description=cls.DESCRIPTION)
+        cls.copy = create_rent(cls.landlord, title="Sunny flat near the park!", description=cls.DESCRIPTION)
+        cls.other = create_rent(cls.landlord, title="Loft", description="Industrial loft with high ceilings.")
+
+    def duplicate_of(self, rent):
+        return RentSignature.objects.get(rent=rent).duplicate_of_id
+
+    def test_rebuild_flags_the_later_copy(self):
+        call_command("find_duplicate_rents", stdout=io.StringIO())
+        self.assertEqual(self.duplicate_of(self.copy), self.original.id)
+        self.assertIsNone(self.duplicate_of(self.original))
+        self.assertIsNone(self.duplicate_of(self.other))
+
+    def test_queued_edits(self):
+        self.assertEqual(sign_queued_rents(), (3, 1))
+        self.assertEqual(sign_queued_rents(), (0, 0))
+
+        self.copy.description = "Something else entirely: a houseboat on the river with its own jetty."
+        self.copy.save(update_fields=["description"])
+        self.assertEqual(sign_queued_rents(), (1, 0))
+        self.assertIsNone(self.duplicate_of(self.copy))
+
+    def test_unrelated_saves_are_not_queued(self):
+        sign_queued_rents()
+        self.other.price = Decimal("120.00")
+        self.other.save(update_fields=["price"])
+        self.assertFalse(Rent.objects.filter(needs_signature=True).exists())
+
+
+class BookingConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.staff = create_user("staff@example.com", is_staff=True)
+        cls.rent = create_rent(cls.landlord)
+        cls.other_rent = create_rent(cls.landlord)
+        today = timezone.localdate()
+
+        def book(rent, start, end, status=Booking.Status.PENDING):
+            return Booking.objects.create(
+                rent=rent, tenant=cls.tenant, status=status,
+                check_in=today + timedelta(days=start), check_out=today + timedelta(days=end),
+            )
+
+        cls.confirmed = book(cls.rent, 10, 15, Booking.Status.CONFIRMED)
+        cls.overlapping = book(cls.rent, 12, 14)
+        cls.adjacent = book(cls.rent, 15, 17)
+        cls.cancelled = book(cls.rent, 11, 13, Booking.Status.CANCELLED)
+        cls.elsewhere = book(cls.other_rent, 10, 15)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_report(self):
+        report = audit_bookings()
+        self.assertEqual((report["rents"], report["bookings"]), (2, 4))
+        self.assertEqual(len(report["conflicts"]), 1)
+        conflict = report["conflicts"][0]
+        self.assertEqual(conflict["rent"], self.rent.id)
+        self.assertEqual([row["id"] for row in conflict["bookings"]], [self.confirmed.id, self.overlapping.id])
+        self.assertEqual(conflict["overlap_nights"], 2)
+        self.assertEqual(report["to_decline"], [self.overlapping.id])
+        self.assertEqual(report["declined"], [])
+        self.assertEqual(Booking.objects.get(pk=self.overlapping.pk).status, Booking.Status.PENDING)
+
+    def test_command_declines(self):
+        out = io.StringIO()
+        call_command("audit_booking_conflicts", "--decline", stdout=out)
+        self.assertIn("declined 1 pending bookings", out.getvalue())
+        self.assertEqual(Booking.objects.get(pk=self.overlapping.pk).status, Booking.Status.DECLINED)
+        self.assertEqual(Booking.objects.get(pk=self.adjacent.pk).status, Booking.Status.PENDING)
+        self.assertEqual(audit_bookings()["conflicts"], [])
+
+    def test_endpoint(self):
+        response = self.client.get("/api/rent/bookings/conflicts/", {"rent": self.other_rent.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["conflicts"], [])
+
+        response = self.client.post(f"/api/rent/bookings/conflicts/?rent={self.rent.id}")
+        self.assertEqual(response.json()["declined"], [self.overlapping.id])
+
+    def test_endpoint_errors(self):
+        self.assertEqual(self.client.get("/api/rent/bookings/conflicts/?rent=x").status_code, 400)
+        self.client.force_authenticate(self.landlord)
+        self.assertEqual(self.client.get("/api/rent/bookings/conflicts/").status_code, 403)
+
+
+class AuditLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = create_user("landlord@example.com", "LANDLORD")
+        cls.tenant = create_user("tenant@example.com")
+        cls.staff = create_user("staff@example.com", is_staff=True)
+        cls.rent = create_rent(cls.landlord)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        today = timezone.localdate()
+        with collect_audit(AuditEntry.Source.COMMAND), self.captureOnCommitCallbacks(execute=True):
+            self.booking = Booking.objects.create(
+                rent=self.rent, tenant=self.tenant,
+                check_in=today + timedelta(days=10), check_out=today + timedelta(days=12),
+            )
+
+    def history(self, **params):
+        params = {"object_type": "booking", "object_id": self.booking.id, **params}
+        return self.client.get("/api/rent/audit/", params)
+
+    def test_records_changed_fields(self):
+        # the collector writes what committed inside it
+        with collect_audit(AuditEntry.Source.COMMAND), self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = Booking.Status.CONFIRMED
+            self.booking.save(update_fields=["status"])
+            # nothing changed, nothing recorded
+            self.booking.save()
+
+        entries = self.history().json()["results"]
+        self.assertEqual([entry["action"] for entry in entries], ["update", "create"])
+        self.assertEqual(entries[0]["changes"], {"status": ["PENDING", "CONFIRMED"]})
+        self.assertEqual(entries[0]["source"], "command")
+        self.assertEqual(entries[1]["changes"]["status"], [None, "PENDING"])
+
+    def test_append_only(self):
+        entry = AuditEntry.objects.get(object_type="booking", object_id=self.booking.id)
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            AuditEntry.objects.all().update(action="delete")
+        with self.assertRaises(ValueError):
+            AuditEntry.objects.all().delete()
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.landlord)
+        self.assertEqual(self.history().status_code, 403)
+
+
+class AuditRequestTests(TransactionTestCase):
+    # the entries of a request are written after its transactions commit
+
+    def test_api_change_records_actor(self):
+        landlord = create_user("landlord@example.com", "LANDLORD")
+        today = timezone.localdate()
+        booking = Booking.objects.create(
+            rent=create_rent(landlord), tenant=create_user("tenant@example.com"),
+            check_in=today + timedelta(days=10), check_out=today + timedelta(days=12),
+        )
+        client = APIClient()
+        client.force_authenticate(landlord)
+        self.assertEqual(client.patch(f"/api/rent/bookings/{booking.id}/confirm/").status_code, 200)
+
+        entry = AuditEntry.objects.filter(object_type="booking", object_id=booking.id).latest("id")
+        self.assertEqual(
+            (entry.action, entry.changes, entry.actor_id, entry.source),
+            ("update", {"status": ["PENDING", "CONFIRMED"]}, landlord.id, "api"),
+        )
@@ -1,12 +1,20 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from applications.rent.views import RentViewSet, BookingViewSet, ReviewViewSet
+from applications.rent.views import (
+    RentViewSet, BookingViewSet, ReviewViewSet, SavedSearchViewSet, AuditEntryViewSet,
+    booking_events_view, rent_calendar_feed,
+)
 
 router = DefaultRouter()
 router.register(r'rents', RentViewSet, basename='rent')
 router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r"reviews", ReviewViewSet, basename="review")
+router.register(r"saved-searches", SavedSearchViewSet, basename="saved-search")
+router.register(r"audit", AuditEntryViewSet, basename="audit")
 
 urlpatterns = [
+    # before the router, which would take "events" for a booking pk
+    path('bookings/events/', booking_events_view, name='booking-events'),
+    path('calendar/<str:token>.ics', rent_calendar_feed, name='rent-calendar-feed'),
     path('', include(router.urls)),
 ] + router.urls
@@ -1,10 +1,22 @@
-from django.db.models import Avg, Q
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.db.models import Avg, Count, Max, Min, Prefetch, Q, Sum
 from rest_framework import viewsets, permissions, filters, status
-from applications.rent.models import Rent, Booking
+from applications.rent.models import Rent, Booking, RentCalendar, SavedSearch, SavedSearchMatch, AuditEntry
 from applications.rent.models.review import Review
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags
+from Finale_Project.metrics import metrics
+from applications.user.auth import CookieJWTAuthentication
 from applications.rent.permissions import (
     IsOwnerOrStaff,
     IsLandlordOrReadOnly,
@@ -12,14 +24,103 @@ from applications.rent.permissions import (
 )
 from applications.rent.serializers import (
     RentSerializer,
+    RentListSerializer,
     BookingSerializer,
+    BookingBatchSerializer,
     ReviewSerializer,
+    SavedSearchSerializer,
+    SavedSearchMatchSerializer,
+    RentCalendarSerializer,
+    AuditEntrySerializer,
+    get_expand_names,
+    get_sparse_field_names,
 )
 from django_filters.rest_framework import DjangoFilterBackend
-from applications.rent.filters import RentFilter
+from applications.rent.filters import AuditEntryFilter, RentFilter, RentOrderingFilter
+from applications.rent.autocomplete import rent_autocomplete, DEFAULT_LIMIT, MAX_LIMIT
+from applications.rent.autocomplete import VERSION_KEY as RENT_VERSION_KEY
+from applications.rent.conflicts import audit_bookings
+from applications.rent.events import booking_events, stream_booking_events
+from applications.rent.ical import build_feed
+from applications.rent.idempotency import idempotent
+from applications.rent.geo import MAX_ZOOM, cell_field, grid_zoom, snap_bbox
+from applications.rent.streaming import aiter_in_thread, iter_in_chunks, stream_json_array, stream_ndjson
+
+CLUSTERS_CACHE_TIMEOUT = 300
+BULK_CACHE_TIMEOUT = 300
+BULK_MAX_IDS = 100
+# the key changes with every booking change, the timeout only frees memory
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class SparseFieldsViewMixin:
+    """
+    Narrows the SQL of GET requests with .only() to the fields
+    the serializer will return (see SparseFieldsMixin).
+    """
+
+    def get_response_field_names(self):
+        available = self.get_serializer_class()().fields
+        names = get_sparse_field_names(self.request, available)
+        return set(available) if names is None else names
+
+    def filter_queryset(self, queryset):
+        return self.narrow_queryset(super().filter_queryset(queryset))
+
+    def narrow_queryset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if self.request.method in permissions.SAFE_METHODS and hasattr(serializer_class, "get_only_fields"):
+            queryset = queryset.only(*serializer_class.get_only_fields(self.get_response_field_names()))
+        return queryset
+
+
+class StreamingListMixin:
+    """
+    Streams list responses for ?stream=1 (JSON array) or
+    Accept: application/x-ndjson, serializing row by row from
+    chunks of the queryset instead of building the whole list.
+    """
+
+    def list(self, request, *args, **kwargs):
+        ndjson = request.accepted_renderer.format == "ndjson"
+        stream = request.query_params.get("stream") in ("1", "true") and request.accepted_renderer.format == "json"
+        if not ndjson and not stream:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        rows = (serializer.to_representation(obj) for obj in iter_in_chunks(queryset))
+
+        content = stream_ndjson(rows) if ndjson else stream_json_array(rows)
+        if isinstance(request._request, ASGIRequest):
+            content = aiter_in_thread(content)
+        return StreamingHttpResponse(content, content_type="application/x-ndjson" if ndjson else "application/json")
 
 
-class RentViewSet(viewsets.ModelViewSet):
+class ExpandViewMixin:
+    """
+    Loads the relations named in ?expand= (see ExpandableFieldsMixin)
+    with select_related / prefetch_related in expand_queryset(), so
+    an expanded page costs the same number of queries at any size.
+    """
+
+    def get_response_field_names(self):
+        names = super().get_response_field_names()
+        expandable = self.get_serializer_class()().get_expandable_fields()
+        return names | (get_expand_names(self.request).keys() & expandable.keys())
+
+    def narrow_queryset(self, queryset):
+        queryset = super().narrow_queryset(queryset)
+        expand = get_expand_names(self.request)
+        if expand:
+            queryset = self.expand_queryset(queryset, expand)
+        return queryset
+
+    def expand_queryset(self, queryset, expand):
+        return queryset
+
+
+class RentViewSet(StreamingListMixin, ExpandViewMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Rent.objects.all()
     serializer_class = RentSerializer
     permission_classes = [
@@ -28,26 +129,44 @@ class RentViewSet(viewsets.ModelViewSet):
         IsLandlordOrReadOnly
     ]
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, RentOrderingFilter]
     filterset_class = RentFilter
     search_fields = ['title', 'description', 'address']
     filterset_fields = ['city', 'room_type', 'rooms_count']
-    ordering_fields = ['price', 'created_at', 'avg_rating']
+    ordering_fields = ['price', 'created_at', 'avg_rating', 'rank_score', 'next_available_from']
     ordering = ['-created_at']
 
     def get_queryset(self):
+        # schema generation at build time runs without a request
+        if getattr(self, "swagger_fake_view", False):
+            return Rent.objects.none()
+
+        qs = self.get_visible_queryset()
+
+        if self.action in ("retrieve", "update", "partial_update"):
+            # the review aggregate is part of the detail ETag
+            return qs.annotate(avg_rating=Avg("reviews__rating"), review_count=Count("reviews"))
+
+        # clusters are grouped by grid cell, the review join would multiply the rows
+        if self.action != "clusters":
+            ordering = self.request.query_params.get("ordering") or ""
+
+            if "avg_rating" in ordering or "average_rating" in self.get_response_field_names():
+                qs = qs.annotate(avg_rating=Avg("reviews__rating"))
+
+            if ordering in ["avg_rating", "-avg_rating"]:
+                qs = qs.filter(avg_rating__isnull=False)
+
+        return qs
+
+    def get_visible_queryset(self):
         user = self.request.user
-        qs = Rent.objects.annotate(avg_rating=Avg("reviews__rating"))
+        qs = Rent.objects.all()
 
         search = self.request.query_params.get("search")
         if search:
             qs = qs.filter(Q(title__icontains=search) | Q(description__icontains=search))
 
-        ordering = self.request.query_params.get("ordering")
-
-        if ordering in ["avg_rating", "-avg_rating"]:
-            qs = qs.filter(avg_rating__isnull=False)
-
         if user.is_superuser or user.is_staff:
             return qs
 
@@ -60,14 +179,304 @@ class RentViewSet(viewsets.ModelViewSet):
 
         return qs.filter(is_active=True)
 
+    def get_visibility_scope(self):
+        user = self.request.user
+        if user.is_staff:
+            return "all"
+        if getattr(user, "role", "") == "LANDLORD":
+            return f"owner:{user.pk}"
+        return "active"
+
+    def filter_without_ordering(self, queryset):
+        for backend in (DjangoFilterBackend, filters.SearchFilter):
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def get_object(self):
+        # update() checks If-Match on the same instance it saves
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
+    def get_representation_tag(self, *state):
+        """
+        Hash of the state a response is built from plus everything
+        the representation varies on (query string, media type, visibility).
+        """
+        variant = (
+            self.request.get_full_path(),
+            getattr(self.request, "accepted_media_type", ""),
+            self.get_visibility_scope(),
+        )
+        return hashlib.md5(repr((state, variant)).encode()).hexdigest()[:16]
+
+    def get_rent_etag(self, rent):
+        """
+        "<version>-<representation>": the version changes only when the rent
+        itself is saved and is what If-Match compares, the representation
+        also follows the review aggregate and the rank score.
+        """
+        version = hashlib.md5(f"{rent.pk}:{rent.updated_at.isoformat()}".encode()).hexdigest()[:12]
+        representation = self.get_representation_tag(
+            rent.rank_score,
+            rent.availability_updated_at,
+            getattr(rent, "review_count", None),
+            getattr(rent, "avg_rating", None),
+        )
+        return f'"{version}-{representation}"'
+
+    def set_validators(self, response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def get_request_etags(self, header):
+        # weak comparison: W/"x" matches "x"
+        return [tag.removeprefix("W/").strip('"') for tag in parse_etags(self.request.headers.get(header, ""))]
+
+    def uses_validators(self):
+        # embedded reviews and owners have no version of their own, so an
+        # ETag from rent columns would miss their edits
+        return not get_expand_names(self.request)
+
+    def is_not_modified(self, etag):
+        tags = self.get_request_etags("If-None-Match")
+        return "*" in tags or etag.strip('"') in tags
+
+    def list(self, request, *args, **kwargs):
+        if not self.uses_validators():
+            return super().list(request, *args, **kwargs)
+
+        # Fingerprint of the filtered rents. rank_score is recomputed on
+        # every review and booking change, so its sum also follows the ratings;
+        # availability_updated_at follows next_available_from.
+        state = self.filter_without_ordering(self.get_visible_queryset()).order_by().aggregate(
+            count=Count("id"),
+            last_modified=Max("updated_at"),
+            rank=Sum("rank_score"),
+            availability=Max("availability_updated_at"),
+        )
+        etag = f'"{self.get_representation_tag(*state.values())}"'
+
+        if self.is_not_modified(etag):
+            return self.set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, state["last_modified"])
+
+        response = super().list(request, *args, **kwargs)
+        return self.set_validators(response, etag, state["last_modified"])
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if not self.uses_validators():
+            return Response(self.get_serializer(instance).data)
+
+        etag = self.get_rent_etag(instance)
+
+        if self.is_not_modified(etag):
+            return self.set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, instance.updated_at)
+
+        response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, etag, instance.updated_at)
+
+    def update(self, request, *args, **kwargs):
+        tags = self.get_request_etags("If-Match")
+        if tags:
+            version = self.get_rent_etag(self.get_object()).strip('"').split("-")[0]
+            if "*" not in tags and version not in (tag.split("-")[0] for tag in tags):
+                return Response(
+                    {"detail": "Объявление было изменено, загрузите его заново."},
+                    status=status.HTTP_412_PRECONDITION_FAILED,
+                )
+
+        response = super().update(request, *args, **kwargs)
+        if response.status_code == 200:
+            instance = self.get_object()
+            self.set_validators(response, self.get_rent_etag(instance), instance.updated_at)
+        return response
+
+    def get_serializer_class(self):
+        params = self.request.query_params if self.request else {}
+        if self.action == "list" and not params.get("fields") and not params.get("omit"):
+            return RentListSerializer
+        return super().get_serializer_class()
+
+    def expand_queryset(self, queryset, expand):
+        if "owner" in expand:
+            queryset = queryset.select_related("owner")
+        if "reviews" in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch("reviews", queryset=Review.objects.select_related("author"))
+            )
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class BookingViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        City and address suggestions for active rents, served from
+        an in-process prefix index instead of the database.
+        """
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        return Response(rent_autocomplete.search(request.query_params.get("q", ""), limit))
+
+    @action(detail=False, methods=["get"], url_path="bulk")
+    def bulk_retrieve(self, request):
+        """
+        Rents for ?ids=1,2,3 in the requested order, with the same
+        visibility as the detail view. Ids that don't exist or aren't
+        visible to the user are listed in not_found. Serialized rents are
+        cached per id and version (updated_at, rank_score and
+        availability_updated_at), so a cache hit costs one narrow query
+        for the whole request.
+        """
+        try:
+            ids = [int(value) for value in request.query_params.get("ids", "").split(",") if value.strip()]
+        except ValueError:
+            return Response({"detail": "ids must be a comma separated list of integers."}, status=400)
+        ids = list(dict.fromkeys(ids))
+        if not ids or len(ids) > BULK_MAX_IDS:
+            return Response({"detail": f"Pass from 1 to {BULK_MAX_IDS} ids."}, status=400)
+
+        versions = {
+            pk: version
+            for pk, *version in self.get_visible_queryset().filter(id__in=ids).values_list(
+                "id", "updated_at", "rank_score", "availability_updated_at"
+            )
+        }
+        # the representation depends on fields/omit/expand, not on the user
+        variant = sorted((key, value) for key, value in request.query_params.lists() if key != "ids")
+        keys = {
+            pk: "rent_bulk:" + hashlib.md5(repr((pk, version, variant)).encode()).hexdigest()
+            for pk, version in versions.items()
+        }
+
+        # embedded reviews and owners aren't part of the version
+        cached = cache.get_many(keys.values()) if self.uses_validators() else {}
+        missing = [pk for pk in versions if keys[pk] not in cached]
+        metrics.inc("cache_requests_total", {"cache": "rent_bulk", "result": "hit"}, len(versions) - len(missing))
+        metrics.inc("cache_requests_total", {"cache": "rent_bulk", "result": "miss"}, len(missing))
+
+        if missing:
+            rents = list(self.narrow_queryset(self.get_queryset().filter(id__in=missing)))
+            fresh = {
+                keys[rent.pk]: data
+                for rent, data in zip(rents, self.get_serializer(rents, many=True).data)
+            }
+            if self.uses_validators():
+                cache.set_many(fresh, BULK_CACHE_TIMEOUT)
+            cached.update(fresh)
+
+        return Response({
+            "results": [cached[keys[pk]] for pk in ids if pk in keys],
+            "not_found": [pk for pk in ids if pk not in keys],
+        })
+
+    @action(detail=False, methods=["get"], url_path="clusters")
+    def clusters(self, request):
+        """
+        Active rents inside ?bbox=min_lng,min_lat,max_lng,max_lat aggregated
+        into map grid cells for ?zoom=, with the usual RentFilter criteria.
+        """
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(v) for v in request.query_params["bbox"].split(","))
+            zoom = int(request.query_params["zoom"])
+        except (KeyError, ValueError):
+            return Response({"detail": "bbox=min_lng,min_lat,max_lng,max_lat and zoom are required."}, status=400)
+
+        if not 0 <= zoom <= MAX_ZOOM or min_lng > max_lng or min_lat > max_lat:
+            return Response({"detail": "Invalid bbox or zoom."}, status=400)
+
+        tiles, (west, south, east, north) = snap_bbox(min_lng, min_lat, max_lng, max_lat, zoom)
+        grid = grid_zoom(zoom)
+
+        filters_key = sorted(
+            (key, value) for key, value in request.query_params.lists() if key not in ("bbox", "zoom")
+        )
+        cache_key = "rent_clusters:" + hashlib.md5(
+            repr((cache.get(RENT_VERSION_KEY), self.get_visibility_scope(), zoom, tiles, filters_key)).encode()
+        ).hexdigest()
+
+        data = cache.get(cache_key)
+        metrics.inc("cache_requests_total", {"cache": "rent_clusters", "result": "miss" if data is None else "hit"})
+        if data is None:
+            qs = self.filter_without_ordering(self.get_queryset())
+
+            cell = cell_field(grid)
+            rows = qs.filter(
+                is_active=True,
+                latitude__gte=south, latitude__lte=north,
+                longitude__gte=west, longitude__lte=east,
+            ).order_by().values(cell).annotate(
+                count=Count("id"),
+                lat=Avg("latitude"),
+                lng=Avg("longitude"),
+                min_price=Min("price"),
+                avg_price=Avg("price"),
+            )
+
+            data = {
+                "zoom": zoom,
+                "grid_zoom": grid,
+                "bbox": [west, south, east, north],
+                "clusters": [
+                    {
+                        "cell": row[cell],
+                        "count": row["count"],
+                        "lat": row["lat"],
+                        "lng": row["lng"],
+                        "min_price": row["min_price"],
+                        "avg_price": round(row["avg_price"], 2),
+                    }
+                    for row in rows
+                ],
+            }
+            cache.set(cache_key, data, CLUSTERS_CACHE_TIMEOUT)
+
+        return Response(data)
+
+    @action(detail=True, methods=["get", "patch"], url_path="calendar")
+    def calendar(self, request, pk=None):
+        """
+        iCalendar sync of the rent, for its owner: the .ics feed URL for
+        other channels ("rotate_token": true to replace it) and the
+        import_url of an external calendar whose events block dates.
+        """
+        rent = self.get_object()
+        if rent.owner_id != request.user.pk and not request.user.is_staff:
+            return Response({"detail": "Календарь доступен только владельцу."}, status=403)
+
+        calendar, _ = RentCalendar.objects.get_or_create(rent=rent)
+        if request.method == "GET":
+            return Response(RentCalendarSerializer(calendar, context=self.get_serializer_context()).data)
+
+        serializer = RentCalendarSerializer(
+            calendar, data=request.data, partial=True, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+class BookingViewSet(StreamingListMixin, ExpandViewMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated, IsBookingParticipant]
 
+    # e.g. a landlord's pending requests: ?status=PENDING&ordering=check_in
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ["status"]
+    ordering_fields = ["check_in", "created_at"]
+
     def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Booking.objects.none()
+
         user = self.request.user
 
         if user.is_superuser:
@@ -75,15 +484,54 @@ class BookingViewSet(viewsets.ModelViewSet):
 
         if user.is_authenticated:
             if hasattr(user, "role") and user.role == "LANDLORD":
-                return Booking.objects.filter(rent__owner=user)
+                return Booking.objects.filter(rent_owner=user)
             return Booking.objects.filter(tenant=user)
 
         return Booking.objects.none()
 
+    def expand_queryset(self, queryset, expand):
+        if "tenant" in expand:
+            queryset = queryset.select_related("tenant")
+        if "rent" in expand:
+            # a prefetch rather than a join, so the rating can be annotated once for all rents
+            rents = Rent.objects.annotate(avg_rating=Avg("reviews__rating"))
+            if "owner" in expand["rent"]:
+                rents = rents.select_related("owner")
+            queryset = queryset.prefetch_related(Prefetch("rent", queryset=rents))
+        return queryset
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(tenant=self.request.user)
 
+    @action(detail=False, methods=["post"], url_path="batch", serializer_class=BookingBatchSerializer)
+    @idempotent
+    def batch_create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save(tenant=request.user)
+
+        if not result["created"]:
+            return Response(result, status=400)
+        return Response(result, status=201)
+
+    @action(detail=False, methods=["get", "post"], url_path="conflicts", permission_classes=[permissions.IsAdminUser])
+    def conflicts(self, request):
+        """
+        Overlapping PENDING/CONFIRMED bookings for staff, ?rent= (repeatable)
+        to narrow it down. POST also declines the later pending ones.
+        """
+        try:
+            rent_ids = [int(value) for value in request.query_params.getlist("rent")] or None
+        except ValueError:
+            return Response({"detail": "rent must be an integer."}, status=400)
+        return Response(audit_bookings(rent_ids, decline=request.method == "POST"))
+
     @action(detail=True, methods=["patch"], url_path="cancel")
+    @idempotent
     def cancel_booking(self, request, pk=None):
         booking = self.get_object()
 
@@ -98,10 +546,11 @@ class BookingViewSet(viewsets.ModelViewSet):
         return Response({"status": "Бронирование отменено."}, status=200)
 
     @action(detail=True, methods=["patch"], url_path="confirm")
+    @idempotent
     def confirm_booking(self, request, pk=None):
         booking = self.get_object()
 
-        if request.user != booking.rent.owner:
+        if request.user.pk != booking.rent_owner_id:
             return Response({"detail": "Только арендодатель может подтверждать бронь."}, status=403)
 
         if booking.status != Booking.Status.PENDING:
@@ -112,10 +561,11 @@ class BookingViewSet(viewsets.ModelViewSet):
         return Response({"status": "Бронирование подтверждено."}, status=200)
 
     @action(detail=True, methods=["patch", "post"], url_path="decline")
+    @idempotent
     def decline_booking(self, request, pk=None):
         booking = self.get_object()
 
-        if request.user != booking.rent.owner:
+        if request.user.pk != booking.rent_owner_id:
             return Response({"detail": "Только арендодатель может отклонить бронь."}, status=403)
 
         if booking.status != Booking.Status.PENDING:
@@ -125,11 +575,141 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking.save()
         return Response({"status": "Бронирование отклонено."}, status=200)
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    queryset = Review.objects.all()
+class ReviewViewSet(StreamingListMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Review.objects.select_related("author")
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)
+
+
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    """
+    The current user's saved searches. New and updated rents that match
+    one are queued in matches until marked as read.
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return SavedSearch.objects.none()
+        return SavedSearch.objects.filter(user=self.request.user)
+
     def perform_create(self, serializer):
-        review = serializer.save(author=self.request.user)
-        review.clean()
+        serializer.save(user=self.request.user)
+
+    def get_matches(self):
+        matches = SavedSearchMatch.objects.filter(search__user=self.request.user).prefetch_related(
+            Prefetch("rent", queryset=Rent.objects.annotate(avg_rating=Avg("reviews__rating")))
+        )
+        if self.request.query_params.get("unread") in ("1", "true"):
+            matches = matches.filter(read_at__isnull=True)
+        return matches
+
+    @action(detail=False, methods=["get"], url_path="matches", serializer_class=SavedSearchMatchSerializer)
+    def matches(self, request):
+        """
+        Rents that matched the user's saved searches, ?unread=1 for the queue.
+        """
+        return Response(self.get_serializer(self.get_matches(), many=True).data)
+
+    @action(detail=False, methods=["post"], url_path="matches/read")
+    def read_matches(self, request):
+        """
+        Marks the given match ids ({"ids": [...]}) or all unread matches as read.
+        """
+        matches = SavedSearchMatch.objects.filter(search__user=request.user, read_at__isnull=True)
+        ids = request.data.get("ids")
+        if ids is not None:
+            if not isinstance(ids, list):
+                return Response({"detail": "ids must be a list."}, status=400)
+            matches = matches.filter(id__in=ids)
+        return Response({"read": matches.update(read_at=timezone.now())})
+
+
+
+class AuditPagination(CursorPagination):
+    ordering = "-created_at"
+    page_size = 100
+    page_size_query_param = "limit"
+    max_page_size = 1000
+
+
+class AuditEntryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Audit log of rent and booking changes for staff, newest first, e.g.
+    the history of one booking: ?object_type=booking&object_id=42.
+    Also filters by actor, source, action and since / until.
+    """
+    queryset = AuditEntry.objects.all()
+    serializer_class = AuditEntrySerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = AuditPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AuditEntryFilter
+
+async def booking_events_view(request):
+    """
+    Server-sent events with the booking status changes of the current
+    user as tenant or rent owner, instead of polling /bookings/. Needs
+    the ASGI server. Resumes after the Last-Event-ID header (or
+    ?last_event_id=), otherwise starts with the next event.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        try:
+            auth = await sync_to_async(CookieJWTAuthentication().authenticate)(request)
+        except AuthenticationFailed:
+            auth = None
+        if auth is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        user = auth[0]
+
+    try:
+        last_id = int(request.headers.get("Last-Event-ID") or request.GET["last_event_id"])
+    except (KeyError, ValueError):
+        last_id = await sync_to_async(booking_events.last_id)()
+
+    response = StreamingHttpResponse(stream_booking_events(user.pk, last_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def rent_calendar_feed(request, token):
+    """
+    Busy dates of a rent (pending and confirmed bookings) as an iCalendar
+    feed for Airbnb, Booking.com and other channels. No login, the token
+    in the URL is the access. The body is cached per calendar version,
+    which every booking change bumps.
+    """
+    calendar = RentCalendar.objects.filter(token=token).values("rent_id", "version", "rent__title").first()
+    if calendar is None:
+        raise Http404
+
+    rent_id, version, title = calendar["rent_id"], calendar["version"], calendar["rent__title"]
+    # the title is the calendar name
+    tag = f"{rent_id}-{version}-{hashlib.md5(title.encode()).hexdigest()[:8]}"
+    etag = f'W/"{tag}"'
+    if tag in [value.removeprefix("W/").strip('"') for value in parse_etags(request.headers.get("If-None-Match", ""))]:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    cache_key = f"rent_ics:{tag}"
+    body = cache.get(cache_key)
+    metrics.inc("cache_requests_total", {"cache": "rent_ics", "result": "miss" if body is None else "hit"})
+    if body is None:
+        body = build_feed(rent_id, title)
+        cache.set(cache_key, body, CALENDAR_CACHE_TIMEOUT)
+
+    response = HttpResponse(body, content_type="text/calendar; charset=utf-8")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
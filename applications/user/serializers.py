@@ -36,4 +36,15 @@ class RegisterSerializer(serializers.ModelSerializer):
                 except Permission.DoesNotExist:
                     continue
 
-        return user
\ No newline at end of file
+        return user
+
+class UserPublicSerializer(serializers.ModelSerializer):
+    """
+    Short user representation for embedding in other objects (?expand=).
+    """
+    name = serializers.CharField(source="__str__", read_only=True)
+
+    class Meta:
+        model = User
+        fields = ["id", "name", "role"]
+        read_only_fields = fields
@@ -1,3 +1,64 @@
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt import serializers as jwt_serializers
+
+from applications.user.models import User
+
+
+class RefreshViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tenant@example.com", "pw12345!")
+
+    def setUp(self):
+        self.client = APIClient()
+        response = self.client.post(
+            "/api/user/auth/login/", {"email": "tenant@example.com", "password": "pw12345!"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def refresh(self, token=None):
+        client = APIClient()
+        client.cookies["refresh_token"] = token or self.client.cookies["refresh_token"].value
+        return client.post("/api/user/auth/refresh/")
+
+    def test_reissues_access_token(self):
+        response = self.refresh()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cookies["access_token"].value)
+        self.assertNotIn("refresh_token", response.cookies)
+
+    def test_without_cookie(self):
+        response = APIClient().post("/api/user/auth/refresh/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalid_token(self):
+        self.assertEqual(self.refresh("not-a-token").status_code, 401)
+
+    def test_inactive_user(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.refresh().status_code, 401)
+
+    def test_deleted_user(self):
+        token = self.client.cookies["refresh_token"].value
+        self.user.delete()
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    # simplejwt rebinds api_settings on setting_changed, the serializer keeps the old object
+    @mock.patch.object(jwt_serializers.api_settings, "ROTATE_REFRESH_TOKENS", True)
+    def test_rotation_blacklists_the_old_token(self):
+        old = self.client.cookies["refresh_token"].value
+        response = self.refresh(old)
+        self.assertEqual(response.status_code, 200)
+        new = response.cookies["refresh_token"].value
+        self.assertNotEqual(new, old)
+
+        self.assertEqual(self.refresh(old).status_code, 401)
+        self.assertEqual(self.refresh(new).status_code, 200)
 
-# Create your tests here.
+    def test_logout_blacklists_the_token(self):
+        token = self.client.cookies["refresh_token"].value
+        self.assertEqual(self.client.post("/api/user/logout/").status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
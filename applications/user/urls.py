@@ -1,9 +1,10 @@
 from django.urls import path
-from applications.user.views import RegisterAPIView, LoginView
+from applications.user.views import RegisterAPIView, LoginView, RefreshView
 from .views import LogoutView
 
 urlpatterns = [
     path('auth/login/', LoginView.as_view(), name='login'),
+    path('auth/refresh/', RefreshView.as_view(), name='token-refresh'),
     path('auth/register/', RegisterAPIView.as_view(), name='register'),
     path('logout/', LogoutView.as_view(), name='logout'),
 ]
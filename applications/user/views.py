@@ -3,11 +3,36 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics, permissions
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework.permissions import AllowAny
 from applications.user.serializers import RegisterSerializer
 from applications.user.models import User
 
+def set_access_cookie(response, access_token):
+    response.set_cookie(
+        key='access_token',
+        value=str(access_token),
+        httponly=True,
+        samesite='Lax',
+        secure=False,
+        expires=datetime.utcfromtimestamp(access_token.payload['exp']),
+    )
+
+
+def set_refresh_cookie(response, refresh):
+    response.set_cookie(
+        key='refresh_token',
+        value=str(refresh),
+        httponly=True,
+        samesite='Lax',
+        secure=False,
+        expires=datetime.utcfromtimestamp(refresh.payload['exp']),
+    )
+
+
 class LoginView(APIView):
     permission_classes = [AllowAny]
 
@@ -18,32 +43,44 @@ class LoginView(APIView):
 
         if user:
             refresh = RefreshToken.for_user(user)
-            access_token = refresh.access_token
-
-            access_expiry = datetime.utcfromtimestamp(access_token.payload['exp'])
-            refresh_expiry = datetime.utcfromtimestamp(refresh.payload['exp'])
 
             response = Response({"detail": "Login successful"}, status=status.HTTP_200_OK)
-            response.set_cookie(
-                key='access_token',
-                value=str(access_token),
-                httponly=True,
-                samesite='Lax',
-                secure=False,
-                expires=access_expiry,
-            )
-            response.set_cookie(
-                key='refresh_token',
-                value=str(refresh),
-                httponly=True,
-                samesite='Lax',
-                secure=False,
-                expires=refresh_expiry,
-            )
+            set_access_cookie(response, refresh.access_token)
+            set_refresh_cookie(response, refresh)
             return response
 
         return Response({"detail": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
+
+class RefreshView(APIView):
+    """
+    Reissues the access_token cookie from the refresh_token cookie,
+    so clients don't have to log in with a password again.
+    """
+    permission_classes = [AllowAny]
+    # an expired access_token cookie must not break the refresh itself
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        raw_token = request.COOKIES.get('refresh_token')
+        if raw_token is None:
+            return Response({"detail": "Refresh token not found"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # checks signature, expiry, the blacklist and USER_AUTHENTICATION_RULE,
+        # rotates and blacklists like the stock refresh endpoint
+        serializer = TokenRefreshSerializer(data={"refresh": raw_token})
+        try:
+            serializer.is_valid(raise_exception=True)
+        except (TokenError, AuthenticationFailed, User.DoesNotExist):
+            return Response({"detail": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        tokens = serializer.validated_data
+        response = Response({"detail": "Token refreshed"}, status=status.HTTP_200_OK)
+        set_access_cookie(response, AccessToken(tokens["access"], verify=False))
+        if "refresh" in tokens:
+            set_refresh_cookie(response, RefreshToken(tokens["refresh"], verify=False))
+        return response
+
 class RegisterAPIView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
@@ -51,6 +88,13 @@ class RegisterAPIView(generics.CreateAPIView):
 
 class LogoutView(APIView):
     def post(self, request):
+        raw_token = request.COOKIES.get('refresh_token')
+        if raw_token is not None:
+            try:
+                RefreshToken(raw_token).blacklist()
+            except TokenError:
+                pass
+
         response = Response({"detail": "Logout successful"}, status=status.HTTP_200_OK)
 
         response.delete_cookie('access_token')